@@ -0,0 +1,29 @@
+"""add invoice_hash to purchases
+
+Revision ID: 0a6d9e2f4c17
+Revises: f5a0c7d3b812
+Create Date: 2026-10-18 14:58:09.273514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d9e2f4c17'
+down_revision: Union[str, Sequence[str], None] = 'f5a0c7d3b812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las compras existentes quedan a NULL y su factura se genera en la primera descarga
+    op.add_column('purchases', sa.Column('invoice_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('purchases', 'invoice_hash')
@@ -0,0 +1,33 @@
+"""create invoice_number_seq sequence
+
+Revision ID: 1c4e7a9b3d25
+Revises: 0a6d9e2f4c17
+Create Date: 2026-10-18 15:31:52.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c4e7a9b3d25'
+down_revision: Union[str, Sequence[str], None] = '0a6d9e2f4c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # INCREMENT BY debe coincidir con INVOICE_NUMBER_SEQUENCE (tamaño de bloque del asignador)
+    op.execute("CREATE SEQUENCE IF NOT EXISTS invoice_number_seq START WITH 1 INCREMENT BY 20")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP SEQUENCE IF EXISTS invoice_number_seq")
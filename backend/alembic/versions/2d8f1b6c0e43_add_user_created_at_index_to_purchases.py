@@ -0,0 +1,32 @@
+"""add user/created_at index to purchases
+
+Revision ID: 2d8f1b6c0e43
+Revises: 1c4e7a9b3d25
+Create Date: 2026-10-18 16:02:14.985120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f1b6c0e43'
+down_revision: Union[str, Sequence[str], None] = '1c4e7a9b3d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Historial paginado por cursor: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+    op.create_index(
+        'ix_purchases_user_created_at_id', 'purchases',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_purchases_user_created_at_id', table_name='purchases')
@@ -0,0 +1,54 @@
+"""create sales rollup tables
+
+Revision ID: 3e9a2c7f5b61
+Revises: 2d8f1b6c0e43
+Create Date: 2026-10-18 16:40:27.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9a2c7f5b61'
+down_revision: Union[str, Sequence[str], None] = '2d8f1b6c0e43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('sales_daily_accessory',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('accessory_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['accessory_id'], ['accessories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'accessory_id')
+    )
+    op.create_index('ix_sales_daily_accessory_day_category', 'sales_daily_accessory', ['day', 'category'], unique=False)
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Marca inicial en 0: la primera pasada del job rellena el histórico por lotes
+    op.execute("INSERT INTO rollup_watermarks (name, last_id) VALUES ('sales', 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks')
+    op.drop_index('ix_sales_daily_accessory_day_category', table_name='sales_daily_accessory')
+    op.drop_table('sales_daily_accessory')
+    op.drop_table('sales_daily')
@@ -0,0 +1,37 @@
+"""create accessory_recommendations table
+
+Revision ID: 4b7d0e3a8c92
+Revises: 3e9a2c7f5b61
+Create Date: 2026-10-18 17:18:44.052736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d0e3a8c92'
+down_revision: Union[str, Sequence[str], None] = '3e9a2c7f5b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('accessory_recommendations',
+    sa.Column('accessory_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('related_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('together', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['accessory_id'], ['accessories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['related_id'], ['accessories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('accessory_id', 'rank')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('accessory_recommendations')
@@ -0,0 +1,34 @@
+"""add keyset pagination indexes to cars
+
+Revision ID: 4f2a9c1d7e3b
+Revises: 930c1a9d2c50
+Create Date: 2026-10-18 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c1d7e3b'
+down_revision: Union[str, Sequence[str], None] = '930c1a9d2c50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las filas antiguas sin created_at romperían la comparación (created_at, id) del cursor
+    op.execute("UPDATE cars SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+    op.create_index('ix_cars_created_at_id', 'cars', ['created_at', 'id'], unique=False)
+    op.create_index('ix_cars_price_id', 'cars', ['price', 'id'], unique=False)
+    op.create_index('ix_cars_year_id', 'cars', ['year', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cars_year_id', table_name='cars')
+    op.drop_index('ix_cars_price_id', table_name='cars')
+    op.drop_index('ix_cars_created_at_id', table_name='cars')
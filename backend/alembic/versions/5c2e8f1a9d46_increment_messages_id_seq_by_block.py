@@ -0,0 +1,34 @@
+"""increment messages_id_seq by blocks of 50
+
+Revision ID: 5c2e8f1a9d46
+Revises: 4b7d0e3a8c92
+Create Date: 2026-10-18 17:52:09.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8f1a9d46'
+down_revision: Union[str, Sequence[str], None] = '4b7d0e3a8c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # INCREMENT BY debe coincidir con MESSAGE_ID_SEQUENCE (tamaño de bloque del asignador).
+    # Los INSERT sin id siguen funcionando: cada nextval reserva un bloque nuevo.
+    op.execute("ALTER SEQUENCE messages_id_seq INCREMENT BY 50")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("ALTER SEQUENCE messages_id_seq INCREMENT BY 1")
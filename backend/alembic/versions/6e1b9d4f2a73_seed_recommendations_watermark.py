@@ -0,0 +1,30 @@
+"""seed recommendations watermark
+
+Revision ID: 6e1b9d4f2a73
+Revises: 5c2e8f1a9d46
+Create Date: 2026-10-18 19:04:37.512906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1b9d4f2a73'
+down_revision: Union[str, Sequence[str], None] = '5c2e8f1a9d46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fila que bloquea compute_recommendations (FOR UPDATE) para que solo un proceso
+    # recalcule por intervalo; updated_at NULL = nunca calculadas
+    op.execute("INSERT INTO rollup_watermarks (name, last_id) VALUES ('recommendations', 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM rollup_watermarks WHERE name = 'recommendations'")
@@ -0,0 +1,37 @@
+"""backfill purchases.created_at and make it not null
+
+Revision ID: 7a3c5e8b1f94
+Revises: 6e1b9d4f2a73
+Create Date: 2026-10-18 19:21:48.306152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c5e8b1f94'
+down_revision: Union[str, Sequence[str], None] = '6e1b9d4f2a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las compras antiguas sin created_at romperían el cursor (created_at, id) de /purchases/me.
+    # Toman la fecha de la compra anterior con fecha (los ids siguen el orden de creación)
+    op.execute("""
+        UPDATE purchases SET created_at = COALESCE(
+            (SELECT max(p.created_at) FROM purchases p WHERE p.id < purchases.id AND p.created_at IS NOT NULL),
+            now()
+        )
+        WHERE created_at IS NULL
+    """)
+    op.alter_column('purchases', 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('purchases', 'created_at', existing_type=sa.DateTime(), nullable=True)
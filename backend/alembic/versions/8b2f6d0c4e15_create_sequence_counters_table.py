@@ -0,0 +1,33 @@
+"""create sequence_counters table
+
+Revision ID: 8b2f6d0c4e15
+Revises: 7a3c5e8b1f94
+Create Date: 2026-10-18 19:38:12.664019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2f6d0c4e15'
+down_revision: Union[str, Sequence[str], None] = '7a3c5e8b1f94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Solo la usa SequenceBlockAllocator en bases sin secuencias (SQLite); en PostgreSQL queda vacía
+    op.create_table('sequence_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sequence_counters')
@@ -0,0 +1,49 @@
+"""add full text and trigram search indexes to cars
+
+Revision ID: 8d51e0b3a6f4
+Revises: 4f2a9c1d7e3b
+Create Date: 2026-10-18 10:03:47.915230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d51e0b3a6f4'
+down_revision: Union[str, Sequence[str], None] = '4f2a9c1d7e3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copia de backend.utils.search.CAR_SEARCH_VECTOR_SQL: ambas expresiones deben ser idénticas
+CAR_SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(brand, '') || ' ' || coalesce(model, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(engine, ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices GIN solo existen en PostgreSQL; en SQLite la búsqueda usa el respaldo con ILIKE
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Índice de texto completo para el parámetro `q=` del catálogo
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_cars_search ON cars USING gin ({CAR_SEARCH_VECTOR_SQL})")
+    # Trigramas para los filtros ILIKE '%...%' de brand/model/fuel_type
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cars_brand_trgm ON cars USING gin (brand gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cars_model_trgm ON cars USING gin (model gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cars_fuel_type_trgm ON cars USING gin (fuel_type gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_cars_fuel_type_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_cars_model_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_cars_brand_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_cars_search")
@@ -0,0 +1,47 @@
+"""keep sales rollups for deleted accessories
+
+Revision ID: 9c4a7e2d5b38
+Revises: 8b2f6d0c4e15
+Create Date: 2026-10-18 20:12:51.407233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4a7e2d5b38'
+down_revision: Union[str, Sequence[str], None] = '8b2f6d0c4e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sin ON DELETE CASCADE: borrar un accesorio ya no borra su histórico de ventas
+    op.drop_constraint('sales_daily_accessory_accessory_id_fkey', 'sales_daily_accessory', type_='foreignkey')
+    op.add_column('sales_daily_accessory', sa.Column('accessory_name', sa.String(), nullable=True))
+    op.execute("""
+        UPDATE sales_daily_accessory SET accessory_name = COALESCE(
+            (SELECT a.name FROM accessories a WHERE a.id = sales_daily_accessory.accessory_id),
+            'Accesorio eliminado'
+        )
+    """)
+    op.alter_column('sales_daily_accessory', 'accessory_name', existing_type=sa.String(), nullable=False)
+    # Importes como NUMERIC, igual que los precios: sumar floats acumula error de redondeo
+    for table in ('sales_daily', 'sales_daily_accessory'):
+        op.alter_column(table, 'revenue', existing_type=sa.Float(), type_=sa.Numeric(14, 2),
+                        existing_nullable=False, postgresql_using='round(revenue::numeric, 2)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('sales_daily', 'sales_daily_accessory'):
+        op.alter_column(table, 'revenue', existing_type=sa.Numeric(14, 2), type_=sa.Float(), existing_nullable=False)
+    op.drop_column('sales_daily_accessory', 'accessory_name')
+    op.create_foreign_key(
+        'sales_daily_accessory_accessory_id_fkey', 'sales_daily_accessory', 'accessories',
+        ['accessory_id'], ['id'], ondelete='CASCADE'
+    )
@@ -0,0 +1,30 @@
+"""add updated_at to users
+
+Revision ID: a1d5f8c3e260
+Revises: 9c4a7e2d5b38
+Create Date: 2026-10-18 20:41:09.582317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d5f8c3e260'
+down_revision: Union[str, Sequence[str], None] = '9c4a7e2d5b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Sin historial de cambios: se parte de la fecha de alta
+    op.execute("UPDATE users SET updated_at = COALESCE(created_at, now() AT TIME ZONE 'utc')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'updated_at')
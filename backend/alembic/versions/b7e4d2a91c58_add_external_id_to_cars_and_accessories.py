@@ -0,0 +1,35 @@
+"""add external_id to cars and accessories
+
+Revision ID: b7e4d2a91c58
+Revises: 8d51e0b3a6f4
+Create Date: 2026-10-18 11:26:05.337412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a91c58'
+down_revision: Union[str, Sequence[str], None] = '8d51e0b3a6f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Clave externa del feed: destino del INSERT ... ON CONFLICT (external_id) de la importación masiva
+    op.add_column('cars', sa.Column('external_id', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_cars_external_id'), 'cars', ['external_id'], unique=True)
+    op.add_column('accessories', sa.Column('external_id', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_accessories_external_id'), 'accessories', ['external_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_accessories_external_id'), table_name='accessories')
+    op.drop_column('accessories', 'external_id')
+    op.drop_index(op.f('ix_cars_external_id'), table_name='cars')
+    op.drop_column('cars', 'external_id')
@@ -0,0 +1,52 @@
+"""add reserved_until to cart_items
+
+Revision ID: e2b8f4c06a91
+Revises: c91f3e6a0d27
+Create Date: 2026-10-18 13:52:47.118203
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8f4c06a91'
+down_revision: Union[str, Sequence[str], None] = 'c91f3e6a0d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Stock que el modelo anterior descontaba al añadir al carrito
+CART_QUANTITY_SQL = (
+    "(SELECT COALESCE(SUM(cart_items.quantity), 0) FROM cart_items "
+    "WHERE cart_items.accessory_id = accessories.id)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cart_items', sa.Column('reserved_until', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_cart_items_reserved_until'), 'cart_items', ['reserved_until'], unique=False)
+    # El stock pasa a ser el físico: se devuelve lo que retenían los carritos existentes,
+    # que conservan una reserva de cortesía de 30 minutos antes de que el barrido la libere.
+    op.execute(
+        f"UPDATE accessories SET stock = stock + {CART_QUANTITY_SQL} "
+        "WHERE id IN (SELECT accessory_id FROM cart_items)"
+    )
+    op.execute(
+        sa.text("UPDATE cart_items SET reserved_until = :until")
+        .bindparams(until=datetime.utcnow() + timedelta(minutes=30))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Vuelve al modelo anterior: el stock en carritos se descuenta del accesorio
+    op.execute(
+        f"UPDATE accessories SET stock = stock - {CART_QUANTITY_SQL} "
+        "WHERE id IN (SELECT accessory_id FROM cart_items)"
+    )
+    op.drop_index(op.f('ix_cart_items_reserved_until'), table_name='cart_items')
+    op.drop_column('cart_items', 'reserved_until')
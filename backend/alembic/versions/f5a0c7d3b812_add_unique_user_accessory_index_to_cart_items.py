@@ -0,0 +1,41 @@
+"""add unique user/accessory index to cart_items
+
+Revision ID: f5a0c7d3b812
+Revises: e2b8f4c06a91
+Create Date: 2026-10-18 14:20:33.460981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a0c7d3b812'
+down_revision: Union[str, Sequence[str], None] = 'e2b8f4c06a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fusionar las líneas duplicadas (clics simultáneos) en la más antigua antes de crear el índice
+    op.execute(
+        "UPDATE cart_items SET "
+        "quantity = (SELECT SUM(dup.quantity) FROM cart_items dup "
+        "WHERE dup.user_id = cart_items.user_id AND dup.accessory_id = cart_items.accessory_id), "
+        "reserved_until = (SELECT MAX(dup.reserved_until) FROM cart_items dup "
+        "WHERE dup.user_id = cart_items.user_id AND dup.accessory_id = cart_items.accessory_id) "
+        "WHERE id IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, accessory_id HAVING COUNT(*) > 1)"
+    )
+    op.execute(
+        "DELETE FROM cart_items "
+        "WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, accessory_id)"
+    )
+    op.create_index('ix_cart_items_user_accessory', 'cart_items', ['user_id', 'accessory_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cart_items_user_accessory', table_name='cart_items')
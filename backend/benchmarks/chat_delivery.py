@@ -0,0 +1,156 @@
+# backend/benchmarks/chat_delivery.py
+"""Latencia de entrega del chat con muchos sockets concurrentes en un mismo worker.
+
+Ejecuta `websocket_endpoint` real contra sockets simulados en un solo event loop y
+mide, por mensaje, el tiempo desde que el emisor lo envía hasta que el receptor lo
+recibe. Compara dos modos:
+    blocking   la BD se llama directamente desde el event loop (comportamiento anterior)
+    threadpool la BD va por `run_db` (hilos acotados)
+
+Sin DATABASE_URL usa un SQLite temporal en autocommit (con transacciones, el
+bloqueo de escritura de SQLite mediría su propia contención, no la del event loop);
+--db-latency-ms simula la ida y vuelta de red de cada consulta, que es lo que
+bloquea el event loop en producción.
+    python backend/benchmarks/chat_delivery.py --pairs 20 --messages 20 --db-latency-ms 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'chat_bench.db')}")
+
+from fastapi import WebSocketDisconnect
+from sqlalchemy import event
+
+from backend import models
+from backend.database.database import Base, SessionLocal, engine
+from backend.routers import messages
+from backend.utils.message_writer import message_writer
+
+if engine.dialect.name == "sqlite":
+    SessionLocal.configure(bind=engine.execution_options(isolation_level="AUTOCOMMIT"))
+
+    @event.listens_for(engine, "connect")
+    def _no_fsync(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+
+class BenchWebSocket:
+    """Lo mínimo de WebSocket que usa el endpoint, sobre colas en memoria."""
+
+    def __init__(self):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.received: asyncio.Queue = asyncio.Queue()
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+    async def receive_text(self) -> str:
+        data = await self.inbox.get()
+        if data is None:
+            raise WebSocketDisconnect(1000)
+        return data
+
+    async def send_text(self, data: str) -> None:
+        self.received.put_nowait((time.perf_counter(), data))
+
+
+def setup_database(pairs: int) -> list[tuple[int, int, int]]:
+    tables = [models.Role.__table__, models.User.__table__, models.Consultation.__table__, models.Message.__table__,
+              models.SequenceCounter.__table__]
+    Base.metadata.drop_all(engine, tables=tables)
+    Base.metadata.create_all(engine, tables=tables)
+    with SessionLocal() as db:
+        result = []
+        for i in range(pairs):
+            user = models.User(username=f"bench_user_{i}", email=f"user{i}@bench.local", password_hash="-")
+            advisor = models.User(username=f"bench_advisor_{i}", email=f"advisor{i}@bench.local", password_hash="-")
+            db.add_all([user, advisor])
+            db.flush()
+            consultation = models.Consultation(message="bench", user_id=user.id, advisor_id=advisor.id, status="responded")
+            db.add(consultation)
+            db.flush()
+            result.append((user.id, advisor.id, consultation.id))
+        db.commit()
+    return result
+
+
+async def run_mode(pairs: list[tuple[int, int, int]], per_pair: int, interval: float) -> list[float]:
+    sockets = {}
+    tasks = []
+    for user_id, advisor_id, _ in pairs:
+        for uid in (user_id, advisor_id):
+            sockets[uid] = BenchWebSocket()
+            tasks.append(asyncio.create_task(messages.websocket_endpoint(sockets[uid], uid)))
+    await asyncio.sleep(0.1)
+
+    # La latencia se mide desde la hora PREVISTA de envío: si el event loop está
+    # bloqueado, el emisor también se retrasa y medir desde el envío real lo ocultaría
+    start = time.perf_counter()
+    sent: dict[str, float] = {}
+
+    async def sender(user_id: int, advisor_id: int, consultation_id: int) -> None:
+        for n in range(per_pair):
+            content = f"{user_id}:{n}"
+            sent[content] = start + n * interval
+            await asyncio.sleep(max(0.0, sent[content] - time.perf_counter()))
+            sockets[user_id].inbox.put_nowait(json.dumps(
+                {"receiver_id": advisor_id, "content": content, "consultation_id": consultation_id}
+            ))
+
+    await asyncio.gather(*(sender(*pair) for pair in pairs))
+    latencies = []
+    for _, advisor_id, _ in pairs:
+        for _ in range(per_pair):
+            received_at, data = await asyncio.wait_for(sockets[advisor_id].received.get(), 60)
+            latencies.append(received_at - sent[json.loads(data)["content"]])
+    for ws in sockets.values():
+        ws.inbox.put_nowait(None)
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=20, help="conversaciones simultáneas (2 sockets cada una)")
+    parser.add_argument("--messages", type=int, default=20, help="mensajes por conversación")
+    parser.add_argument("--interval-ms", type=float, default=50, help="pausa entre mensajes de un mismo emisor")
+    parser.add_argument("--db-latency-ms", type=float, default=3, help="latencia simulada por consulta")
+    args = parser.parse_args()
+
+    if args.db_latency_ms:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _simulated_round_trip(*_):
+            time.sleep(args.db_latency_ms / 1000)
+
+    pairs = setup_database(args.pairs)
+    run_db = messages.run_db
+
+    async def blocking(func, *func_args):
+        return func(*func_args)
+
+    for mode, runner in (("blocking", blocking), ("threadpool", run_db)):
+        messages.run_db = runner
+        start = time.perf_counter()
+        latencies = np.array(await run_mode(pairs, args.messages, args.interval_ms / 1000)) * 1000
+        elapsed = time.perf_counter() - start
+        print(f"{mode:<11} {len(latencies)} mensajes en {elapsed:.2f} s  "
+              f"p50={np.percentile(latencies, 50):.1f} ms  p99={np.percentile(latencies, 99):.1f} ms  "
+              f"max={latencies.max():.1f} ms")
+    messages.run_db = run_db
+    await message_writer.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+# backend/benchmarks/similar_cars.py
+"""Latencia de GET /api/cars/{id}/similar sobre un catálogo sintético.
+
+Mide solo el índice en memoria (sin BD ni HTTP): la consulta top-k, la escritura
+incremental de una fila y la reconstrucción completa.
+    python backend/benchmarks/similar_cars.py --cars 100000 --k 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils.similarity import SIMILARITY_FEATURES, CarFeatureIndex
+
+
+def synthetic_catalog(n: int, seed: int = 42) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    raw = np.column_stack([
+        rng.integers(1990, 2026, n),            # year
+        rng.lognormal(10.3, 0.6, n).round(2),   # price
+        rng.integers(70, 700, n),               # horsepower
+        rng.integers(150, 350, n),              # top_speed
+        rng.integers(0, 300000, n),             # mileage
+    ]).astype(np.float64)
+    raw[rng.random(raw.shape) < 0.05] = np.nan  # ~5% de specs sin rellenar
+    return np.arange(1, n + 1, dtype=np.int64), raw
+
+
+def percentiles(samples: list[float]) -> str:
+    ms = np.array(samples) * 1000
+    return f"p50={np.percentile(ms, 50):.3f} ms  p95={np.percentile(ms, 95):.3f} ms  p99={np.percentile(ms, 99):.3f} ms"
+
+
+class _Row:
+    def __init__(self, car_id: int, values: np.ndarray):
+        self.id, self.is_published, self.deleted_at = car_id, True, None
+        for name, value in zip(SIMILARITY_FEATURES, values):
+            setattr(self, name, value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cars", type=int, default=100000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    ids, raw = synthetic_catalog(args.cars)
+    index = CarFeatureIndex(max_age=float("inf"))  # que ninguna consulta dispare una reconstrucción
+    start = time.perf_counter()
+    index.load(ids, raw)
+    print(f"Reconstrucción completa ({args.cars} coches): {(time.perf_counter() - start) * 1000:.1f} ms")
+    index.version = 0  # sin caché de por medio: el índice se da por actualizado
+
+    rng = np.random.default_rng(7)
+    samples = []
+    for car_id in rng.choice(ids, args.queries).tolist():
+        start = time.perf_counter()
+        index.nearest(None, car_id, args.k)
+        samples.append(time.perf_counter() - start)
+    print(f"Consulta top-{args.k}:        {percentiles(samples)}")
+
+    samples = []
+    for version, car_id in enumerate(rng.choice(ids, args.queries).tolist(), start=1):
+        row = _Row(car_id, raw[car_id - 1] * 1.01)
+        start = time.perf_counter()
+        index.on_write(version, car=row)
+        samples.append(time.perf_counter() - start)
+    print(f"Escritura incremental:  {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,71 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# Caché de lecturas del catálogo: "memory://" (LRU en proceso) o "redis://host:6379/0" (requiere `pip install redis`)
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+# Índice en memoria de "coches parecidos": se reconstruye desde la BD como mucho cada tantos
+# segundos aunque la versión "cars" no cambie (con memory:// no se ven las escrituras de otros workers)
+SIMILAR_CARS_MAX_AGE_SECONDS = int(os.getenv("SIMILAR_CARS_MAX_AGE_SECONDS", "60"))
+
+# Claves Idempotency-Key: cuánto tiempo se guardan las respuestas para reintentos
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+# Reservas del carrito: cuánto tiempo queda apartado el stock y cada cuánto se liberan las caducadas
+CART_RESERVATION_MINUTES = int(os.getenv("CART_RESERVATION_MINUTES", "30"))
+CART_SWEEP_INTERVAL_SECONDS = int(os.getenv("CART_SWEEP_INTERVAL_SECONDS", "60"))
+
+# Almacén de facturas renderizadas (HTML gzip, un fichero por sha256 del contenido)
+INVOICE_STORE_DIR = os.getenv(
+    "INVOICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "invoices", "store")
+)
+
+# Resúmenes de ventas para el panel de administración: cada cuánto se actualizan y
+# qué antigüedad mínima debe tener una compra para sumarse (margen para checkouts en curso)
+ANALYTICS_ROLLUP_INTERVAL_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "60"))
+ANALYTICS_ROLLUP_LAG_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "30"))
+
+# "Comprados juntos": vecinos guardados por accesorio y cada cuánto se recalculan
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "10"))
+RECOMMENDATIONS_INTERVAL_SECONDS = int(os.getenv("RECOMMENDATIONS_INTERVAL_SECONDS", "3600"))
+# Cada cuánto comprueba cada proceso de la API si otro proceso recalculó las recomendaciones
+RECOMMENDATIONS_RELOAD_SECONDS = int(os.getenv("RECOMMENDATIONS_RELOAD_SECONDS", "60"))
+
+# Backplane del chat entre workers/hosts: "memory://" (un proceso), "postgresql://..." (LISTEN/NOTIFY)
+# o "redis://host:6379/0" (requiere `pip install redis`)
+BROKER_URL = os.getenv("BROKER_URL", "memory://")
+# Longitud máxima de un mensaje de chat, en caracteres. No garantiza por sí sola que el evento
+# quepa en un NOTIFY (< 8000 bytes en UTF-8: 1000 emojis son ~4000): el chat comprueba el tamaño
+# codificado antes de aceptar el mensaje
+MESSAGE_MAX_LENGTH = int(os.getenv("MESSAGE_MAX_LENGTH", "1000"))
+
+# Mensajes pendientes de envío por WebSocket; un cliente que acumula más se desconecta
+SOCKET_SEND_QUEUE_SIZE = int(os.getenv("SOCKET_SEND_QUEUE_SIZE", "100"))
+
+# Persistencia diferida del chat: los mensajes se entregan al momento y se insertan por lotes
+# cada MESSAGE_FLUSH_INTERVAL_MS o al juntar MESSAGE_FLUSH_BATCH_SIZE; si la BD falla, van al
+# fichero de respaldo y se reintentan en el siguiente volcado
+MESSAGE_FLUSH_INTERVAL_MS = int(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", "50"))
+MESSAGE_FLUSH_BATCH_SIZE = int(os.getenv("MESSAGE_FLUSH_BATCH_SIZE", "500"))
+MESSAGE_SPOOL_PATH = os.getenv(
+    "MESSAGE_SPOOL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "spool", "messages.jsonl")
+)
+# Mensajes que la BD rechaza uno a uno (p. ej. su consulta ya no existe): se apartan aquí
+# para revisarlos a mano en vez de bloquear el respaldo
+MESSAGE_DEAD_LETTER_PATH = os.getenv(
+    "MESSAGE_DEAD_LETTER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "spool", "messages.dead.jsonl")
+)
+
+# Hilos para el acceso síncrono a la BD desde código async (chat): no más que conexiones
+# del pool de SQLAlchemy (5 + 10 de overflow por defecto), para que ningún hilo espere conexión
+DB_THREADPOOL_SIZE = int(os.getenv("DB_THREADPOOL_SIZE", "15"))
+
+# Tareas periódicas (limpieza de claves, barridos...) dentro del proceso de la API.
+# Desactivado por defecto: con varios workers de uvicorn cada uno lanzaría las suyas;
+# en producción corren solo en `python backend/worker.py`
+RUN_BACKGROUND_JOBS = os.getenv("RUN_BACKGROUND_JOBS", "false").lower() == "true"
@@ -0,0 +1,79 @@
+# backend/import_catalog.py
+"""Importación masiva de coches o accesorios desde un feed NDJSON, JSON o CSV.
+
+Uso:
+    python backend/import_catalog.py cars feed.ndjson
+    python backend/import_catalog.py accessories proveedor.csv --batch-size 2000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Asegurar que el directorio raíz esté en sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database.database import SessionLocal
+from backend.models.accessory import Accessory
+from backend.models.car import Car
+from backend.schemas.accessory import AccessoryCreate
+from backend.schemas.car import CarCreate
+from backend.utils.bulk_import import BULK_BATCH_SIZE, bulk_upsert
+from backend.utils.cache import bump_version
+
+TARGETS = {
+    "cars": (Car, CarCreate),
+    "accessories": (Accessory, AccessoryCreate),
+}
+
+
+def _csv_cell(value: str):
+    # Mismo formato que la exportación CSV: arrays/JSON van como JSON dentro de la celda
+    if value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def read_rows(path: str):
+    """Lee el feed fila a fila (salvo JSON, que es un único array)."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                # Las celdas vacías se omiten para que apliquen los valores por defecto del esquema
+                yield {key: _csv_cell(value) for key, value in row.items() if value != ""}
+        elif path.endswith(".json"):
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva del catálogo")
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("path", help="Fichero .ndjson, .json o .csv")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    model, schema = TARGETS[args.target]
+    print(f"🚀 Importando {args.target} desde {args.path}...")
+    db = SessionLocal()
+    try:
+        result = bulk_upsert(db, model, schema, read_rows(args.path), args.batch_size)
+        bump_version(args.target)  # con CACHE_URL=redis:// invalida también la caché de los workers
+    finally:
+        db.close()
+
+    print(f"✅ {result['upserted']} de {result['received']} filas insertadas/actualizadas.")
+    for error in result["errors"]:
+        print(f"❌ Fila {error['index']}: {error['errors']}")
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.database.database import Base, engine
-from backend.routers import accessories, auth, cars, consultations, user_car_gallery, users, cart, notifications, accessory_comments, purchases, messages, user_car_gallery_comments 
+from backend.routers import accessories, auth, cars, consultations, user_car_gallery, users, cart, notifications, accessory_comments, purchases, messages, user_car_gallery_comments, admin_analytics
+
+from backend.config import RUN_BACKGROUND_JOBS
+from backend.utils.background import start_periodic_jobs, stop_periodic
+from backend.utils.broker import get_broker
+from backend.utils.message_writer import message_writer
 
 from dotenv import load_dotenv
 
@@ -36,6 +41,34 @@ app.include_router(accessory_comments.router, prefix="/api/accessories", tags=["
 app.include_router(purchases.router, prefix="/api/purchases", tags=["Purchases"])
 app.include_router(messages.router, prefix="/api/messages", tags=["Messages"])
 app.include_router(user_car_gallery_comments.router, prefix="/api/gallery", tags=["Gallery Comments"])
+app.include_router(admin_analytics.router, prefix="/api/admin/analytics", tags=["Admin Analytics"])
+
+@app.on_event("startup")
+async def start_background_jobs():
+    if RUN_BACKGROUND_JOBS:
+        start_periodic_jobs()
+
+@app.on_event("startup")
+async def start_event_broker():
+    # Una suscripción por proceso: reparte los eventos del chat a los sockets de este worker
+    await get_broker().start()
+
+@app.on_event("startup")
+async def start_message_writer():
+    # Reinserta lo que quedara en el fichero de respaldo del chat
+    await message_writer.start()
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await stop_periodic()
+
+@app.on_event("shutdown")
+async def flush_message_writer():
+    await message_writer.stop()
+
+@app.on_event("shutdown")
+async def stop_event_broker():
+    await get_broker().stop()
 
 @app.get("/")
 def root():
@@ -12,4 +12,8 @@ from .notification import Notification
 from .purchase_item import PurchaseItem
 from .purchase import Purchase
 from .message import Message
-from .user_car_gallery_comment import UserCarGalleryComment
\ No newline at end of file
+from .user_car_gallery_comment import UserCarGalleryComment
+from .idempotency_key import IdempotencyKey
+from .sales_rollup import SalesDaily, SalesDailyAccessory, RollupWatermark
+from .accessory_recommendation import AccessoryRecommendation
+from .sequence_counter import SequenceCounter
@@ -19,5 +19,6 @@ class Accessory(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted_at = Column(DateTime, nullable=True)
+    external_id = Column(String(100), unique=True, index=True, nullable=True)  # clave del proveedor (upsert masivo)
 
     creator = relationship("User", back_populates="accessories")
\ No newline at end of file
@@ -0,0 +1,13 @@
+# backend/models/accessory_recommendation.py
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from ..database.database import Base
+
+class AccessoryRecommendation(Base):
+    """Top-K accesorios comprados junto a `accessory_id` (lo recalcula el job de recomendaciones)."""
+    __tablename__ = "accessory_recommendations"
+
+    accessory_id = Column(Integer, ForeignKey("accessories.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 0 = el más relacionado
+    related_id = Column(Integer, ForeignKey("accessories.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)     # similitud coseno de la co-ocurrencia
+    together = Column(Integer, nullable=False)  # nº de compras con ambos accesorios
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, JSON, ARRAY, Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, JSON, ARRAY, Numeric, Index
 from sqlalchemy.orm import relationship
 from ..database.database import Base
 from datetime import datetime
@@ -28,4 +28,12 @@ class Car(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ✅ ¡AÑADIDO!
     deleted_at = Column(DateTime, nullable=True)
-    creator = relationship("User", back_populates="cars")
\ No newline at end of file
+    external_id = Column(String(100), unique=True, index=True, nullable=True)  # clave del feed del concesionario (upsert masivo)
+    creator = relationship("User", back_populates="cars")
+
+    # Índices compuestos (columna de orden, id) para la paginación por cursor del catálogo
+    __table_args__ = (
+        Index("ix_cars_created_at_id", "created_at", "id"),
+        Index("ix_cars_price_id", "price", "id"),
+        Index("ix_cars_year_id", "year", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from ..database.database import Base
 from datetime import datetime
@@ -12,6 +12,13 @@ class CartItem(Base):
     quantity = Column(Integer, default=1)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Hasta cuándo está apartado el stock; NULL = en el carrito pero sin reserva (caducada)
+    reserved_until = Column(DateTime, nullable=True, index=True)
 
     user = relationship("User")
     accessory = relationship("Accessory")
+
+    # Una línea por usuario y accesorio: destino del INSERT ... ON CONFLICT al añadir
+    __table_args__ = (
+        Index("ix_cart_items_user_accessory", "user_id", "accessory_id", unique=True),
+    )
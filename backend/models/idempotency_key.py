@@ -0,0 +1,18 @@
+# backend/models/idempotency_key.py
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, UniqueConstraint
+from ..database.database import Base
+from datetime import datetime
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)          # cabecera Idempotency-Key del cliente
+    scope = Column(String(50), nullable=False)         # endpoint protegido ("checkout", "cart:add"...)
+    request_hash = Column(String(64), nullable=False)  # sha256 del cuerpo: la misma clave no vale para otra petición
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)        # respuesta original ya serializada
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (UniqueConstraint('user_id', 'key', name='_idempotency_user_key_uc'),)
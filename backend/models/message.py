@@ -1,12 +1,16 @@
 # backend/models/message.py
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Boolean, Sequence
 from sqlalchemy.orm import relationship
 from ..database.database import Base
 from datetime import datetime
 
+# La secuencia del SERIAL, con INCREMENT BY 50: el chat asigna ids por bloques en memoria
+# (SequenceBlockAllocator) para entregar el mensaje antes de insertarlo
+MESSAGE_ID_SEQUENCE = Sequence("messages_id_seq", increment=50)
+
 class Message(Base):
     __tablename__ = "messages"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, MESSAGE_ID_SEQUENCE, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     consultation_id = Column(Integer, ForeignKey("consultations.id"), nullable=True)  # ✅
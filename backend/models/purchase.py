@@ -1,16 +1,25 @@
 # backend/models/purchase.py
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Float
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Float, Sequence, Index, text
 from sqlalchemy.orm import relationship
 from ..database.database import Base
 from datetime import datetime
 
+# Números de factura: cada nextval reserva un bloque de 20 (ver utils/sequences.py)
+INVOICE_NUMBER_SEQUENCE = Sequence("invoice_number_seq", start=1, increment=20, metadata=Base.metadata)
+
 class Purchase(Base):
     __tablename__ = "purchases"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     total_amount = Column(Float, nullable=False)
     invoice_number = Column(String, unique=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    invoice_hash = Column(String(64), nullable=True)  # sha256 del HTML guardado en INVOICE_STORE_DIR
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # clave del cursor del historial
 
     user = relationship("User", back_populates="purchases")
-    items = relationship("PurchaseItem", back_populates="purchase", lazy="select")
\ No newline at end of file
+    items = relationship("PurchaseItem", back_populates="purchase", lazy="select")
+
+    # Historial del usuario (GET /api/purchases/me): filtro por user_id + keyset por (created_at, id) DESC
+    __table_args__ = (
+        Index("ix_purchases_user_created_at_id", "user_id", text("created_at DESC"), text("id DESC")),
+    )
@@ -0,0 +1,40 @@
+# backend/models/sales_rollup.py
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Index
+from ..database.database import Base
+from datetime import datetime
+
+class SalesDaily(Base):
+    """Pedidos e ingresos por día (resumen incremental de `purchases`)."""
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+class SalesDailyAccessory(Base):
+    """Unidades e ingresos por día y accesorio (resumen incremental de `purchase_items`).
+
+    Sin clave foránea a `accessories`: borrar un accesorio no cambia las ventas ya
+    resumidas, y el nombre y la categoría quedan guardados tal como eran al venderse.
+    """
+    __tablename__ = "sales_daily_accessory"
+
+    day = Column(Date, primary_key=True)
+    accessory_id = Column(Integer, primary_key=True)
+    accessory_name = Column(String, nullable=False)  # nombre en el momento de la venta
+    category = Column(String(100), nullable=False)  # categoría en el momento de la venta
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_sales_daily_accessory_day_category", "day", "category"),
+    )
+
+class RollupWatermark(Base):
+    """Última compra ya procesada por un job: "sales" (resúmenes, solo procesa las posteriores)
+    o "recommendations" (última compra incluida y hora del último recálculo)."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,10 @@
+# backend/models/sequence_counter.py
+from sqlalchemy import Column, BigInteger, String
+from ..database.database import Base
+
+class SequenceCounter(Base):
+    """Sustituto de las secuencias en bases que no las tienen (SQLite): un contador por nombre."""
+    __tablename__ = "sequence_counters"
+
+    name = Column(String(50), primary_key=True)  # nombre de la secuencia de PostgreSQL que sustituye
+    value = Column(BigInteger, nullable=False)   # siguiente valor a repartir
@@ -13,6 +13,7 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     role_id = Column(Integer, ForeignKey("roles.id"), nullable=False, default=3)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag de las respuestas que incrustan al usuario
     is_active = Column(Boolean, default=True)
     avatar_url = Column(String, nullable=True)
 
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from backend.database.database import get_db
+from typing import Literal, Optional
 from backend import models, schemas
 from backend.schemas.accessory import AccessoryCreate, AccessoryOut, AccessoryUpdate # <-- Asegúrate de que AccessoryUpdate esté importado
+from backend.schemas.bulk_import import BulkImportResult
+from backend.config import RECOMMENDATIONS_TOP_K
+from backend.utils.bulk_import import BULK_BATCH_SIZE, bulk_upsert
+from backend.utils.cache import bump_version, cached_json, dump_json
+from backend.utils.export import export_response
+from backend.utils.recommendations import related_index
+from backend.utils.reservations import availability_query
 
 router = APIRouter()
 
@@ -11,19 +20,85 @@ def create_accessory(accessory: AccessoryCreate, db: Session = Depends(get_db)):
     db_accessory = models.accessory.Accessory(**accessory.dict())
     db.add(db_accessory)
     db.commit()
+    bump_version("accessories")
     db.refresh(db_accessory)
     return db_accessory
 
+@router.post("/bulk", response_model=BulkImportResult)
+def bulk_import_accessories(
+    rows: list[dict] = Body(...),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    # Cada fila se valida con AccessoryCreate; las inválidas se reportan sin abortar el lote
+    result = bulk_upsert(db, models.accessory.Accessory, AccessoryCreate, rows, batch_size)
+    bump_version("accessories")
+    return result
+
 @router.get("/", response_model=list[AccessoryOut])
-def get_accessories(db: Session = Depends(get_db)):
-    return db.query(models.accessory.Accessory).all()
+def get_accessories(request: Request, db: Session = Depends(get_db)):
+    return cached_json(
+        request, "accessories",
+        lambda: dump_json(list[AccessoryOut], db.query(models.accessory.Accessory).all()),
+        lambda: tuple(db.query(
+            func.max(models.accessory.Accessory.updated_at), func.count(models.accessory.Accessory.id)
+        ).one()),
+    )
+
+@router.get("/export")
+def export_accessories(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = Query(False, description="Comprime la respuesta al vuelo (Content-Encoding: gzip)"),
+):
+    # Streaming con cursor del servidor: memoria constante sin importar el tamaño del catálogo
+    return export_response(models.accessory.Accessory, "accessories", format, gzip)
+
+@router.get("/availability", response_model=list[schemas.AccessoryAvailabilityOut])
+def get_accessories_availability(
+    ids: Optional[str] = Query(None, description="IDs separados por comas; sin ids, todo el catálogo"),
+    db: Session = Depends(get_db)
+):
+    # Sin caché: las reservas cambian con cada carrito y caducan solas
+    accessory_ids = None
+    if ids:
+        try:
+            accessory_ids = [int(value) for value in ids.split(",") if value.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids debe ser una lista de enteros separados por comas")
+    return availability_query(db, accessory_ids).all()
 
 @router.get("/{accessory_id}", response_model=AccessoryOut)
-def get_accessory(accessory_id: int, db: Session = Depends(get_db)):
-    accessory = db.query(models.accessory.Accessory).filter(models.accessory.Accessory.id == accessory_id).first()
-    if not accessory:
-        raise HTTPException(status_code=404, detail="Accesorio no encontrado")
-    return accessory
+def get_accessory(accessory_id: int, request: Request, db: Session = Depends(get_db)):
+    def produce() -> bytes:
+        accessory = db.query(models.accessory.Accessory).filter(models.accessory.Accessory.id == accessory_id).first()
+        if not accessory:
+            raise HTTPException(status_code=404, detail="Accesorio no encontrado")
+        return dump_json(AccessoryOut, accessory)
+    def validators():
+        row = db.query(models.accessory.Accessory.updated_at).filter(models.accessory.Accessory.id == accessory_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Accesorio no encontrado")
+        return row.updated_at, 1
+    return cached_json(request, "accessories", produce, validators)
+
+@router.get("/{accessory_id}/related", response_model=list[AccessoryOut])
+def get_related_accessories(
+    accessory_id: int,
+    limit: int = Query(4, ge=1, le=RECOMMENDATIONS_TOP_K),
+    db: Session = Depends(get_db)
+):
+    # "Comprados juntos": vecinos precalculados por el job de recomendaciones (en memoria)
+    related_ids = related_index.get(db, accessory_id)
+    if not related_ids:
+        return []
+    Accessory = models.accessory.Accessory
+    accessories = {
+        accessory.id: accessory
+        for accessory in db.query(Accessory).filter(
+            Accessory.id.in_(related_ids), Accessory.is_published.is_(True), Accessory.deleted_at.is_(None)
+        )
+    }
+    return [accessories[id_] for id_ in related_ids if id_ in accessories][:limit]
 
 @router.put("/{accessory_id}", response_model=AccessoryOut)
 def update_accessory(accessory_id: int, updated_accessory: AccessoryCreate, db: Session = Depends(get_db)):
@@ -33,6 +108,7 @@ def update_accessory(accessory_id: int, updated_accessory: AccessoryCreate, db:
     for key, value in updated_accessory.dict().items():
         setattr(accessory, key, value)
     db.commit()
+    bump_version("accessories")
     db.refresh(accessory)
     return accessory
 
@@ -44,6 +120,7 @@ def patch_accessory(accessory_id: int, updated_accessory: AccessoryUpdate, db: S
     for key, value in updated_accessory.dict(exclude_unset=True).items():
         setattr(accessory, key, value)
     db.commit()
+    bump_version("accessories")
     db.refresh(accessory)
     return accessory
 
@@ -54,4 +131,5 @@ def delete_accessory(accessory_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Accesorio no encontrado")
     db.delete(accessory)
     db.commit()
+    bump_version("accessories")
     return {"message": "Accesorio eliminado correctamente"}
\ No newline at end of file
@@ -0,0 +1,84 @@
+# backend/routers/admin_analytics.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.database.database import get_db
+from backend import models
+from backend.security.oauth2 import get_current_admin
+from backend.schemas.analytics import CategoryRevenueOut, DailyRevenueOut, RollupStatusOut, TopSellerOut
+from backend.utils.analytics import SALES_WATERMARK
+from datetime import date, timedelta
+from typing import Optional
+
+# Todo se lee de las tablas de resumen (sales_daily*), nunca de purchases/purchase_items
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+class DateRange:
+    """Rango [start, end] por día; por defecto, los últimos 30 días."""
+
+    def __init__(self, start: Optional[date] = None, end: Optional[date] = None):
+        self.end = end or date.today()
+        self.start = start or self.end - timedelta(days=29)
+        if self.end < self.start:
+            raise HTTPException(status_code=400, detail="La fecha final no puede ser anterior a la inicial")
+
+    def apply(self, query, column):
+        return query.filter(column >= self.start, column <= self.end)
+
+
+@router.get("/revenue/daily", response_model=list[DailyRevenueOut])
+def get_daily_revenue(period: DateRange = Depends(), db: Session = Depends(get_db)):
+    SalesDaily = models.SalesDaily
+    return period.apply(db.query(SalesDaily), SalesDaily.day).order_by(SalesDaily.day).all()
+
+
+@router.get("/revenue/categories", response_model=list[CategoryRevenueOut])
+def get_category_revenue(period: DateRange = Depends(), db: Session = Depends(get_db)):
+    SalesDailyAccessory = models.SalesDailyAccessory
+    revenue = func.sum(SalesDailyAccessory.revenue)
+    return period.apply(
+        db.query(
+            SalesDailyAccessory.category,
+            func.sum(SalesDailyAccessory.units).label("units"),
+            revenue.label("revenue"),
+        ),
+        SalesDailyAccessory.day,
+    ).group_by(SalesDailyAccessory.category).order_by(revenue.desc()).all()
+
+
+@router.get("/top-sellers", response_model=list[TopSellerOut])
+def get_top_sellers(
+    period: DateRange = Depends(),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    SalesDailyAccessory = models.SalesDailyAccessory
+    units = func.sum(SalesDailyAccessory.units)
+    totals = period.apply(
+        db.query(
+            SalesDailyAccessory.accessory_id,
+            func.max(SalesDailyAccessory.accessory_name).label("accessory_name"),
+            units.label("units"),
+            func.sum(SalesDailyAccessory.revenue).label("revenue"),
+        ),
+        SalesDailyAccessory.day,
+    ).group_by(SalesDailyAccessory.accessory_id).order_by(units.desc()).limit(limit).subquery()
+    # El nombre actual se une después del LIMIT (solo `limit` filas tocan la tabla de
+    # accesorios); si el accesorio ya no existe, queda el guardado en el resumen
+    return db.query(
+        totals.c.accessory_id,
+        func.coalesce(models.Accessory.name, totals.c.accessory_name).label("name"),
+        totals.c.units,
+        totals.c.revenue,
+    ).outerjoin(models.Accessory, models.Accessory.id == totals.c.accessory_id)\
+        .order_by(totals.c.units.desc()).all()
+
+
+@router.get("/status", response_model=RollupStatusOut)
+def get_rollup_status(db: Session = Depends(get_db)):
+    # Hasta qué compra llegan los resúmenes (el job va ANALYTICS_ROLLUP_LAG_SECONDS por detrás)
+    watermark = db.query(models.RollupWatermark).filter(models.RollupWatermark.name == SALES_WATERMARK).first()
+    if watermark is None:
+        return {"last_purchase_id": 0}
+    return {"last_purchase_id": watermark.last_id, "updated_at": watermark.updated_at}
@@ -1,51 +1,256 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from sqlalchemy import Integer, String, cast, func, literal, select, union_all
 from sqlalchemy.orm import Session
 from backend.database.database import get_db
 from backend import models, schemas
-from backend.schemas.car import CarCreate, CarOut, CarUpdate # <-- Importación explícita para evitar errores de atributos
-from typing import Sequence, Union, Optional # ✅ ¡CORREGIDO! Optional añadido aquí
+from backend.schemas.car import CarCreate, CarOut, CarUpdate, CarPage, CarFacets, CarSummaryOut, CarSummaryPage, CAR_FIELDS, car_fields_models # <-- Importación explícita para evitar errores de atributos
+from backend.schemas.bulk_import import BulkImportResult
+from backend.utils.bulk_import import BULK_BATCH_SIZE, bulk_upsert
+from backend.utils.cache import cached_json, dump_json, get_cache
+from backend.utils.export import export_response
+from backend.utils.pagination import keyset_page
+from backend.utils.search import car_search_conditions, car_search_rank, search_terms
+from backend.utils.similarity import similar_cars, similarity_features
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal, Sequence, Union, Optional # ✅ ¡CORREGIDO! Optional añadido aquí
 router = APIRouter()
+
+# Columnas permitidas para ordenar/paginar por cursor y cómo parsear su valor desde el cursor.
+# Cada una tiene un índice compuesto (columna, id) en la migración 4f2a9c1d7e3b.
+CAR_SORT_COLUMNS = {
+    "created_at": (models.car.Car.created_at, datetime.fromisoformat),
+    "price": (models.car.Car.price, Decimal),
+    "year": (models.car.Car.year, int),
+    "id": (models.car.Car.id, int),
+}
+
+# Las lecturas del catálogo (listado, detalle y facetas) se cachean ya serializadas
+# bajo la versión "cars"; cada escritura la incrementa y deja obsoletas todas las entradas.
+# El índice de coches parecidos se actualiza fila a fila con el coche escrito (o borrado).
+def invalidate_car_caches(car: Optional[models.car.Car] = None, deleted_id: Optional[int] = None) -> None:
+    version = get_cache().bump_version("cars")
+    if car is not None or deleted_id is not None:
+        similar_cars.on_write(version, car=car, deleted_id=deleted_id)
+
+class CarFilters:
+    """Filtros del catálogo compartidos por los endpoints de listado."""
+    def __init__(
+        self,
+        brand: Optional[str] = None,
+        model: Optional[str] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        fuel_type: Optional[str] = None,
+        q: Optional[str] = None,
+    ):
+        self.brand = brand
+        self.model = model
+        self.min_year = min_year
+        self.max_year = max_year
+        self.min_price = min_price
+        self.max_price = max_price
+        self.fuel_type = fuel_type
+        self.q = q
+        self.terms = search_terms(q)
+
+    def apply(self, query):
+        if self.brand:
+            query = query.filter(models.car.Car.brand.ilike(f"%{self.brand}%"))
+        if self.model:
+            query = query.filter(models.car.Car.model.ilike(f"%{self.model}%"))
+        if self.min_year:
+            query = query.filter(models.car.Car.year >= self.min_year)
+        if self.max_year:
+            query = query.filter(models.car.Car.year <= self.max_year)
+        if self.min_price:
+            query = query.filter(models.car.Car.price >= self.min_price)
+        if self.max_price:
+            query = query.filter(models.car.Car.price <= self.max_price)
+        if self.fuel_type:
+            query = query.filter(models.car.Car.fuel_type.ilike(f"%{self.fuel_type}%"))
+        if self.terms:
+            # Texto libre: índice GIN tsvector en PostgreSQL, ILIKE por término en SQLite
+            dialect = query.session.get_bind().dialect.name
+            query = query.filter(*car_search_conditions(dialect, self.terms))
+        return query
+
+    def validators(self, db: Session):
+        """(max(updated_at), nº de filas) del conjunto filtrado, para ETag/Last-Modified."""
+        car = models.car.Car
+        return tuple(self.apply(db.query(func.max(car.updated_at), func.count(car.id))).one())
+
+    def rank(self, db: Session):
+        return car_search_rank(db.get_bind().dialect.name, self.terms)
+
+CAR_SUMMARY_FIELDS = ("id", "brand", "model", "year", "price", "image_url")
+
+def car_projection(fields: Optional[str], dialect: str):
+    """Columnas a seleccionar y esquemas (ítem, página) según `fields=`.
+
+    - sin `fields`: resumen compacto (CarSummaryOut), sin description/specifications
+    - `fields=all`: el CarOut completo de siempre
+    - `fields=brand,model,...`: solo esas columnas (más `id`)
+    """
+    car = models.car.Car
+    if fields == "all":
+        return [car], CarOut, CarPage
+    if fields is None:
+        names, item, page = CAR_SUMMARY_FIELDS, CarSummaryOut, CarSummaryPage
+    else:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(CAR_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        names = tuple(name for name in CAR_FIELDS if name in requested or name == "id")
+        item, page = car_fields_models(names)
+    columns = [getattr(car, name) for name in names]
+    if fields is None and dialect == "postgresql":
+        # La grilla solo usa la primera imagen: se recorta el array en la propia consulta
+        columns[names.index("image_url")] = car.image_url[1:1].label("image_url")
+    return columns, item, page
+
 @router.post("/", response_model=CarOut, status_code=status.HTTP_201_CREATED)
 def create_car(car: CarCreate, db: Session = Depends(get_db)):
     db_car = models.car.Car(**car.dict())
     db.add(db_car)
     db.commit()
     db.refresh(db_car)
+    invalidate_car_caches(db_car)
     return db_car
-@router.get("/", response_model=list[CarOut])
+@router.post("/bulk", response_model=BulkImportResult)
+def bulk_import_cars(
+    rows: list[dict] = Body(...),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    # Cada fila se valida con CarCreate; las inválidas se reportan sin abortar el lote
+    result = bulk_upsert(db, models.car.Car, CarCreate, rows, batch_size)
+    invalidate_car_caches()
+    return result
+@router.get("/", response_model=Union[list[CarSummaryOut], CarSummaryPage])
 def get_all_cars(
-    brand: Optional[str] = None,
-    model: Optional[str] = None,
-    min_year: Optional[int] = None,
-    max_year: Optional[int] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    fuel_type: Optional[str] = None,
+    request: Request,
+    filters: CarFilters = Depends(),
+    fields: Optional[str] = Query(None, description="Campos separados por comas, o `all` para el CarOut completo"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    after: Optional[str] = None,
+    sort: Literal["created_at", "price", "year", "id"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    db: Session = Depends(get_db)
+):
+    def produce() -> bytes:
+        columns, item_schema, page_schema = car_projection(fields, db.get_bind().dialect.name)
+        # Sin `limit` ni `after` se mantiene la respuesta clásica (lista completa)
+        if limit is None and after is None:
+            query = filters.apply(db.query(*columns))
+            if filters.terms:
+                # Con `q` se ordena por relevancia; en modo cursor manda la columna `sort`
+                query = query.order_by(filters.rank(db).desc(), models.car.Car.id)
+            return dump_json(list[item_schema], query.all())
+        column, parse = CAR_SORT_COLUMNS[sort]
+        if fields != "all" and all(c.key != column.key for c in columns):
+            columns.append(column)  # el cursor necesita el valor de la columna de orden
+        cars, next_cursor = keyset_page(
+            filters.apply(db.query(*columns)), column, models.car.Car.id, f"{sort}.{order}",
+            limit or 20, after, parse, descending=(order == "desc"),
+        )
+        return dump_json(page_schema, {"items": cars, "next_cursor": next_cursor})
+    return cached_json(request, "cars", produce, lambda: filters.validators(db))
+@router.get("/facets", response_model=CarFacets)
+def get_car_facets(
+    request: Request,
+    filters: CarFilters = Depends(),
+    year_bucket: int = Query(10, ge=1),
+    price_bucket: int = Query(50000, ge=1),
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.car.Car)
-    if brand:
-        query = query.filter(models.car.Car.brand.ilike(f"%{brand}%"))
-    if model:
-        query = query.filter(models.car.Car.model.ilike(f"%{model}%"))
-    if min_year:
-        query = query.filter(models.car.Car.year >= min_year)
-    if max_year:
-        query = query.filter(models.car.Car.year <= max_year)
-    if min_price:
-        query = query.filter(models.car.Car.price >= min_price)
-    if max_price:
-        query = query.filter(models.car.Car.price <= max_price)
-    if fuel_type:
-        query = query.filter(models.car.Car.fuel_type.ilike(f"%{fuel_type}%"))
-    cars = query.all()
-    return cars
+    return cached_json(
+        request, "cars",
+        lambda: dump_json(CarFacets, _compute_car_facets(db, filters, year_bucket, price_bucket)),
+        lambda: filters.validators(db),
+    )
+
+def facet_bucket_start(column, size: int):
+    # floor() y no CAST(... AS INTEGER): en PostgreSQL el CAST redondea (149999.99 / 50000 -> 3),
+    # y el coche caería en el tramo siguiente
+    return cast(func.floor(column / size), Integer) * size
+
+def _compute_car_facets(db: Session, filters: CarFilters, year_bucket: int, price_bucket: int) -> dict:
+    # Un único SELECT ... UNION ALL sobre un CTE con los filtros actuales:
+    # todos los GROUP BY viajan en la misma ida y vuelta a la base de datos.
+    car = models.car.Car
+    filtered = filters.apply(
+        db.query(car.brand, car.fuel_type, car.transmission, car.drive_train, car.year, car.price)
+    ).cte("filtered_cars")
+    year_start = facet_bucket_start(filtered.c.year, year_bucket)
+    price_start = facet_bucket_start(filtered.c.price, price_bucket)
+
+    def facet(name, expr):
+        return select(
+            literal(name).label("facet"),
+            cast(expr, String).label("value"),
+            func.count().label("count"),
+        ).group_by(expr)
+
+    stmt = union_all(
+        select(literal("total").label("facet"), cast(None, String).label("value"), func.count().label("count")).select_from(filtered),
+        facet("brand", filtered.c.brand),
+        facet("fuel_type", filtered.c.fuel_type),
+        facet("transmission", filtered.c.transmission),
+        facet("drive_train", filtered.c.drive_train),
+        facet("year", year_start),
+        facet("price", price_start),
+    )
+
+    result = {"total": 0, "brand": [], "fuel_type": [], "transmission": [], "drive_train": [], "year": [], "price": []}
+    for facet_name, value, count in db.execute(stmt):
+        if facet_name == "total":
+            result["total"] = count
+        elif facet_name == "year" and value is not None:
+            start = int(value)
+            result["year"].append({"min": start, "max": start + year_bucket, "count": count})
+        elif facet_name == "price" and value is not None:
+            start = int(value)
+            result["price"].append({"min": start, "max": start + price_bucket, "count": count})
+        elif facet_name not in ("year", "price"):
+            result[facet_name].append({"value": value, "count": count})
+    for name in ("brand", "fuel_type", "transmission", "drive_train"):
+        result[name].sort(key=lambda f: (-f["count"], f["value"] or ""))
+    for name in ("year", "price"):
+        result[name].sort(key=lambda f: f["min"])
+    return result
+@router.get("/export")
+def export_cars(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = Query(False, description="Comprime la respuesta al vuelo (Content-Encoding: gzip)"),
+):
+    # Streaming con cursor del servidor: memoria constante sin importar el tamaño del catálogo
+    return export_response(models.car.Car, "cars", format, gzip)
 @router.get("/{car_id}", response_model=CarOut)
-def get_car_by_id(car_id: int, db: Session = Depends(get_db)):
+def get_car_by_id(car_id: int, request: Request, db: Session = Depends(get_db)):
+    def produce() -> bytes:
+        car = db.query(models.car.Car).filter(models.car.Car.id == car_id).first()
+        if not car:
+            raise HTTPException(status_code=404, detail="Coche no encontrado")
+        return dump_json(CarOut, car)
+    def validators():
+        row = db.query(models.car.Car.updated_at).filter(models.car.Car.id == car_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Coche no encontrado")
+        return row.updated_at, 1
+    return cached_json(request, "cars", produce, validators)
+@router.get("/{car_id}/similar", response_model=list[CarSummaryOut])
+def get_similar_cars(car_id: int, k: int = Query(6, ge=1, le=50), db: Session = Depends(get_db)):
     car = db.query(models.car.Car).filter(models.car.Car.id == car_id).first()
     if not car:
         raise HTTPException(status_code=404, detail="Coche no encontrado")
-    return car
+    # Top-k por distancia ponderada sobre la matriz en memoria; la BD solo carga los k resultados
+    ids = similar_cars.nearest(db, car_id, k, raw=similarity_features(car))
+    cars = {c.id: c for c in db.query(models.car.Car).filter(models.car.Car.id.in_(ids))}
+    return [cars[i] for i in ids if i in cars]
 @router.put("/{car_id}", response_model=CarOut)
 def update_car(car_id: int, updated_car: CarCreate, db: Session = Depends(get_db)):
     car = db.query(models.car.Car).filter(models.car.Car.id == car_id).first()
@@ -55,6 +260,7 @@ def update_car(car_id: int, updated_car: CarCreate, db: Session = Depends(get_db
         setattr(car, key, value)
     db.commit()
     db.refresh(car)
+    invalidate_car_caches(car)
     return car
 @router.patch("/{car_id}", response_model=CarOut)
 def patch_car(car_id: int, updated_car: CarUpdate, db: Session = Depends(get_db)):
@@ -65,6 +271,7 @@ def patch_car(car_id: int, updated_car: CarUpdate, db: Session = Depends(get_db)
         setattr(car, key, value)
     db.commit()
     db.refresh(car)
+    invalidate_car_caches(car)
     return car
 @router.delete("/{car_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_car(car_id: int, db: Session = Depends(get_db)):
@@ -73,4 +280,5 @@ def delete_car(car_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Coche no encontrado")
     db.delete(car)
     db.commit()
+    invalidate_car_caches(deleted_id=car_id)
     return {"message": "Coche eliminado correctamente"}
\ No newline at end of file
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session, joinedload
 from backend.database.database import get_db
 from backend import models, schemas
 from backend.security.oauth2 import get_current_user
+from backend.utils.idempotency import claim_idempotency_key, store_idempotent_response
+from backend.utils.reservations import reservation_deadline, reserved_by_others
+from backend.utils.upsert import upsert_insert
+from typing import Optional
+from datetime import datetime
 
 router = APIRouter()
 
@@ -14,66 +19,138 @@ def get_cart_items(
 ):
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail="No autorizado")
-    items = db.query(models.cart_item.CartItem)\
+    return _cart_items(db, user_id)
+
+
+def _cart_items(db: Session, user_id: int):
+    return db.query(models.cart_item.CartItem)\
         .options(joinedload(models.cart_item.CartItem.accessory))\
         .filter(models.cart_item.CartItem.user_id == user_id)\
+        .order_by(models.cart_item.CartItem.id)\
         .all()
-    return items
 
 
 @router.post("/", response_model=schemas.CartItemOut, status_code=status.HTTP_201_CREATED)
 def add_to_cart(
     item: schemas.CartItemCreate,
     db: Session = Depends(get_db),
-    current_user: models.user.User = Depends(get_current_user)
+    current_user: models.user.User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
     if current_user.id != item.user_id:
         raise HTTPException(status_code=403, detail="No autorizado")
 
-    # 🔍 Obtener el accesorio
+    # 🔁 Reintento de un alta ya aplicada: no se vuelve a sumar cantidad ni a reservar stock
+    claim = claim_idempotency_key(db, current_user.id, idempotency_key, "cart:add", item.model_dump())
+    if isinstance(claim, Response):
+        return claim
+
+    quantity = item.quantity or 1
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="La cantidad debe ser mayor que 0.")
+
+    # 🔒 Bloquear el accesorio: dos altas simultáneas no pueden reservar el mismo stock
     accessory = db.query(models.accessory.Accessory).filter(
         models.accessory.Accessory.id == item.accessory_id
-    ).first()
+    ).with_for_update().first()
     if not accessory:
         raise HTTPException(status_code=404, detail="Accesorio no encontrado")
 
-    quantity = item.quantity or 1
-    if quantity <= 0:
-        raise HTTPException(status_code=400, detail="La cantidad debe ser mayor que 0.")
+    # 🚫 Disponible = stock − reservas activas de otros usuarios
+    available = accessory.stock - reserved_by_others(db, [accessory.id], current_user.id).get(accessory.id, 0)
+
+    # ➕ Alta o suma en una sola sentencia: INSERT ... ON CONFLICT (user_id, accessory_id)
+    # DO UPDATE ... RETURNING. El índice único evita líneas duplicadas con clics simultáneos
+    # y la línea completa vuelve a quedar reservada hasta reserved_until.
+    CartItem = models.cart_item.CartItem
+    stmt = upsert_insert(db, CartItem).values(
+        user_id=item.user_id,
+        accessory_id=item.accessory_id,
+        quantity=quantity,
+        reserved_until=reservation_deadline(),
+        created_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CartItem.user_id, CartItem.accessory_id],
+        set_={
+            "quantity": CartItem.quantity + stmt.excluded.quantity,
+            "reserved_until": stmt.excluded.reserved_until,
+        }
+    ).returning(CartItem)
+    # populate_existing: si la línea ya estaba en la sesión, se refresca con lo que devolvió RETURNING
+    cart_item = db.execute(stmt, execution_options={"populate_existing": True}).scalar_one()
+    if cart_item.quantity > available:
+        # Lo que ya tenía en el carrito cuenta: se informa de cuánto más puede añadir
+        remaining = max(available - (cart_item.quantity - quantity), 0)
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Solo hay {remaining} unidades disponibles.")
+    response = schemas.CartItemOut.model_validate(cart_item).model_dump(mode="json")
+    store_idempotent_response(claim, status.HTTP_201_CREATED, response)  # misma transacción que el alta
+    db.commit()
+    return response
 
-    # 🚫 Verificar stock disponible
-    if accessory.stock < quantity:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Solo hay {accessory.stock} unidades disponibles."
-        )
-
-    # ➖ Disminuir el stock inmediatamente
-    accessory.stock -= quantity
-    db.add(accessory)
-
-    # ➕ Verificar si ya existe en el carrito
-    existing = db.query(models.cart_item.CartItem).filter(
-        models.cart_item.CartItem.user_id == item.user_id,
-        models.cart_item.CartItem.accessory_id == item.accessory_id
-    ).first()
 
-    if existing:
-        existing.quantity += quantity
-        db.add(existing)
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        new_item = models.cart_item.CartItem(
-            user_id=item.user_id,
-            accessory_id=item.accessory_id,
-            quantity=quantity
-        )
-        db.add(new_item)
-        db.commit()
-        db.refresh(new_item)
-        return new_item
+@router.put("/{user_id}", response_model=list[schemas.CartItemOut])
+def replace_cart(
+    user_id: int,
+    lines: list[schemas.CartLineIn],
+    db: Session = Depends(get_db),
+    current_user: models.user.User = Depends(get_current_user)
+):
+    """Sustituye el carrito por `lines` aplicando solo la diferencia, en una transacción.
+
+    Un PUT repetido deja el mismo carrito, así que no necesita Idempotency-Key.
+    """
+    if current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="No autorizado")
+    CartItem = models.cart_item.CartItem
+    Accessory = models.accessory.Accessory
+
+    desired: dict[int, int] = {}
+    for line in lines:
+        if line.quantity <= 0:
+            raise HTTPException(status_code=400, detail="La cantidad debe ser mayor que 0.")
+        desired[line.accessory_id] = desired.get(line.accessory_id, 0) + line.quantity
+
+    if desired:
+        # 🔒 Una única consulta para todos los accesorios, bloqueados en orden de id (como el checkout)
+        accessories = db.query(Accessory)\
+            .filter(Accessory.id.in_(desired))\
+            .order_by(Accessory.id)\
+            .with_for_update()\
+            .all()
+        if len(accessories) != len(desired):
+            raise HTTPException(status_code=404, detail="Accesorio no encontrado")
+        reserved = reserved_by_others(db, desired, user_id)
+        for accessory in accessories:
+            available = accessory.stock - reserved.get(accessory.id, 0)
+            if available < desired[accessory.id]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Solo hay {max(available, 0)} unidades disponibles de {accessory.name}."
+                )
+
+    # ➖ Líneas que ya no están en el carrito: un solo DELETE
+    removed = db.query(CartItem).filter(CartItem.user_id == user_id)
+    if desired:
+        removed = removed.filter(CartItem.accessory_id.notin_(desired))
+    removed.delete(synchronize_session=False)
+
+    # ✏️ Líneas nuevas o modificadas: un único INSERT multi-fila ... ON CONFLICT DO UPDATE,
+    # que además renueva la reserva de todo el carrito
+    if desired:
+        reserved_until = reservation_deadline()
+        stmt = upsert_insert(db, CartItem).values([
+            {"user_id": user_id, "accessory_id": accessory_id, "quantity": quantity,
+             "reserved_until": reserved_until, "created_at": datetime.utcnow()}
+            for accessory_id, quantity in desired.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[CartItem.user_id, CartItem.accessory_id],
+            set_={"quantity": stmt.excluded.quantity, "reserved_until": stmt.excluded.reserved_until}
+        ))
+    db.commit()
+    return _cart_items(db, user_id)
 
 
 @router.delete("/{user_id}/{accessory_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -94,14 +171,7 @@ def remove_from_cart(
     if not item:
         raise HTTPException(status_code=404, detail="Ítem no encontrado en el carrito")
 
-    # 🔁 Devolver el stock al accesorio
-    accessory = db.query(models.accessory.Accessory).filter(
-        models.accessory.Accessory.id == accessory_id
-    ).first()
-    if accessory:
-        accessory.stock += item.quantity
-        db.add(accessory)
-
+    # La reserva desaparece con el ítem: no hay stock que devolver
     db.delete(item)
     db.commit()
     return
\ No newline at end of file
@@ -4,11 +4,19 @@ from backend.database.database import get_db
 from backend import models, schemas
 from backend.schemas.consultation import ConsultationCreate, ConsultationOut, ConsultationUpdate
 from backend.security.oauth2 import get_current_user  # ✅ ¡IMPORTANTE! Para obtener el usuario actual
+from backend.utils.broker import publish_on_commit
 from datetime import datetime as dt
 
 
 
 router = APIRouter()
+
+# El chat cachea por socket qué consultas están autorizadas: cualquier cambio de estado o
+# de participantes lo invalida en todos los procesos. Se llama antes del commit: el aviso
+# sale con él (y no sale si la transacción se deshace)
+def notify_consultation_changed(db: Session, consultation_id: int) -> None:
+    publish_on_commit(db, {"type": "consultation.changed", "consultation_id": consultation_id})
+
 @router.post("/", response_model=ConsultationOut, status_code=status.HTTP_201_CREATED)
 def create_consultation(
     consultation: ConsultationCreate,
@@ -58,6 +66,7 @@ def update_consultation(consultation_id: int, updated_consultation: Consultation
         raise HTTPException(status_code=404, detail="Consulta no encontrada")
     for key, value in updated_consultation.dict().items():
         setattr(db_consultation, key, value)
+    notify_consultation_changed(db, consultation_id)
     db.commit()
     db.refresh(db_consultation)
     return db_consultation
@@ -69,6 +78,7 @@ def patch_consultation(consultation_id: int, updated_consultation: ConsultationU
         raise HTTPException(status_code=404, detail="Consulta no encontrada")
     for key, value in updated_consultation.dict(exclude_unset=True).items():
         setattr(db_consultation, key, value)
+    notify_consultation_changed(db, consultation_id)
     db.commit()
     db.refresh(db_consultation)
     return db_consultation
@@ -79,6 +89,7 @@ def delete_consultation(consultation_id: int, db: Session = Depends(get_db)):
     if not consultation:
         raise HTTPException(status_code=404, detail="Consulta no encontrada")
     db.delete(consultation)
+    notify_consultation_changed(db, consultation_id)
     db.commit()
     return {"message": "Consulta eliminada correctamente"}
 
@@ -111,6 +122,7 @@ def respond_consultation(
     db_consultation.answered_at = dt.utcnow()
     db_consultation.updated_at = dt.utcnow()
 
+    notify_consultation_changed(db, consultation_id)
     db.commit()
     db.refresh(db_consultation)
 
@@ -1,83 +1,195 @@
 # backend/routers/messages.py
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
-from backend.database.database import get_db
+from typing import List, Optional
+from backend.database.database import SessionLocal, get_db
 from backend import models
+from backend.models.message import MESSAGE_ID_SEQUENCE
+from backend.config import MESSAGE_MAX_LENGTH
+from backend.schemas.message import ChatMessageIn
 from backend.security.oauth2 import get_current_user
+from backend.utils.background import run_db
+from backend.utils.broker import fits_in_broker, publish, subscribe
+from backend.utils.message_writer import message_writer
+from backend.utils.sequences import SequenceBlockAllocator
+from backend.utils.socket_sender import SocketSender
+from datetime import datetime
+import asyncio
 import json
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-active_connections: dict[int, list[WebSocket]] = {}
+class ChatSocket(SocketSender):
+    """Cola de salida del socket + las consultas ya autorizadas para él.
 
-async def send_message_to_user(user_id: int, message: dict):
-    if user_id in active_connections:
-        for ws in active_connections[user_id]:
-            try:
-                await ws.send_text(json.dumps(message))
-            except:
-                active_connections[user_id] = [w for w in active_connections[user_id] if w != ws]
+    `authorized` guarda consultation_id -> único receptor válido (el otro participante)
+    mientras la consulta siga "responded"; el evento "consultation.changed" la borra.
+    `invalidations` cuenta esos eventos: si llega uno mientras se valida la consulta
+    en la BD, el resultado puede ser anterior al cambio y no se guarda.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        super().__init__(websocket)
+        self.authorized: dict[int, int] = {}
+        self.invalidations = 0
+
+# Sockets abiertos en ESTE proceso; los de otros workers/hosts se alcanzan vía broker
+active_connections: dict[int, list[ChatSocket]] = {}
+message_ids = SequenceBlockAllocator(MESSAGE_ID_SEQUENCE, models.Message.id)
+
+def chat_event(user_id: int, message: dict) -> dict:
+    # El mensaje viaja como objeto anidado, no como JSON dentro de JSON: escaparlo dos veces
+    # multiplica el tamaño de los caracteres no ASCII y no cabría en un NOTIFY
+    # Cada proceso recibe el evento y entrega a sus sockets locales
+    return {"type": "chat.message", "user_id": user_id, "message": message}
+
+@subscribe("chat.message")
+async def _deliver_chat_message(event: dict):
+    # Se serializa una vez por proceso; el mismo texto va a todos los sockets del destinatario
+    deliver_to_local_sockets(event["user_id"], json.dumps(event["message"], ensure_ascii=False))
+
+def deliver_to_local_sockets(user_id: int, payload: str):
+    # Solo encola en cada socket: un cliente lento no frena al resto (ver SocketSender)
+    for sender in list(active_connections.get(user_id, [])):
+        if not sender.send(payload):
+            _unregister(user_id, sender)
+
+@subscribe("consultation.changed")
+async def _forget_consultation(event: dict):
+    for senders in active_connections.values():
+        for sender in senders:
+            sender.authorized.pop(event["consultation_id"], None)
+            sender.invalidations += 1
+
+def _register(user_id: int, sender: ChatSocket):
+    active_connections.setdefault(user_id, []).append(sender)
+
+def _unregister(user_id: int, sender: ChatSocket):
+    senders = active_connections.get(user_id, [])
+    if sender in senders:
+        senders.remove(sender)
+    if not senders:
+        active_connections.pop(user_id, None)
+
+# El bucle del socket es async: todo acceso a la BD va por `run_db` (hilos acotados) con
+# una sesión corta por operación, en vez de una sesión síncrona abierta toda la conexión
+def _load_username(user_id: int) -> Optional[str]:
+    with SessionLocal() as db:
+        return db.query(models.User.username).filter(models.User.id == user_id).scalar()
+
+def _next_message_id() -> int:
+    with SessionLocal() as db:
+        message_id = message_ids.next_value(db)
+        db.commit()  # sin secuencias (SQLite) el contador avanza en esta transacción
+        return message_id
+
+def _authorize_message(user_id: int, receiver_id: int, consultation_id: int) -> Optional[int]:
+    """Comprueba la consulta y reserva el id del mensaje; None si no es válida."""
+    with SessionLocal() as db:
+        consultation = db.query(models.Consultation.id).filter(
+            models.Consultation.id == consultation_id,
+            models.Consultation.user_id.in_([user_id, receiver_id]),
+            models.Consultation.advisor_id.in_([user_id, receiver_id]),
+            models.Consultation.status == "responded"
+        ).first()
+        if not consultation:
+            return None
+        message_id = message_ids.next_value(db)
+        db.commit()
+        return message_id
 
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+async def websocket_endpoint(websocket: WebSocket, user_id: int):
+    username = await run_db(_load_username, user_id)
+    if username is None:
         await websocket.close(code=4001)
         return
 
     await websocket.accept()
-    if user_id not in active_connections:
-        active_connections[user_id] = []
-    active_connections[user_id].append(websocket)
+    # Todo lo que se envía a este socket (mensajes y errores) pasa por su cola de salida
+    sender = ChatSocket(websocket)
+    _register(user_id, sender)
 
     try:
         while True:
             data = await websocket.receive_text()
-            message_data = json.loads(data)
-            receiver_id = message_data["receiver_id"]
-            content = message_data["content"]
-            consultation_id = message_data.get("consultation_id")
+            # Un frame mal formado (JSON inválido, claves ausentes, tipos erróneos) se
+            # contesta con un error; no debe tumbar la conexión
+            try:
+                message_in = ChatMessageIn.model_validate_json(data)
+            except ValueError:
+                sender.send(json.dumps({"error": "Mensaje inválido"}))
+                continue
+            # Enteros también en la clave de la caché ("5" y 5 son la misma consulta)
+            receiver_id, content, consultation_id = message_in.receiver_id, message_in.content, message_in.consultation_id
 
             if not consultation_id:
-                await websocket.send_text(json.dumps({"error": "Falta consultation_id"}))
+                sender.send(json.dumps({"error": "Falta consultation_id"}))
+                continue
+            if len(content) > MESSAGE_MAX_LENGTH:
+                sender.send(json.dumps({"error": f"El mensaje supera {MESSAGE_MAX_LENGTH} caracteres"}))
                 continue
 
-            consultation = db.query(models.Consultation).filter(
-                models.Consultation.id == consultation_id,
-                models.Consultation.user_id.in_([user_id, receiver_id]),
-                models.Consultation.advisor_id.in_([user_id, receiver_id]),
-                models.Consultation.status == "responded"
-            ).first()
+            if sender.authorized.get(consultation_id) == receiver_id:
+                # Consulta ya validada en este socket: sin consulta a la BD salvo al agotar el bloque de ids
+                message_id = message_ids.try_next_value()
+                if message_id is None:
+                    message_id = await run_db(_next_message_id)
+            else:
+                invalidations = sender.invalidations
+                message_id = await run_db(_authorize_message, user_id, receiver_id, consultation_id)
+                if message_id is None:
+                    sender.send(json.dumps({"error": "Consulta no válida"}))
+                    continue
+                if sender.invalidations == invalidations:
+                    sender.authorized[consultation_id] = receiver_id
 
-            if not consultation:
-                await websocket.send_text(json.dumps({"error": "Consulta no válida"}))
+            created_at = datetime.utcnow()
+            message = {
+                "id": message_id,
+                "sender_id": user_id,
+                "receiver_id": receiver_id,
+                "consultation_id": consultation_id,
+                "content": content,
+                "created_at": created_at.isoformat(),
+                "sender": {"username": username}
+            }
+            event = chat_event(receiver_id, message)
+            if not fits_in_broker(event):
+                # Antes de guardarlo: un mensaje que no se puede entregar no se persiste
+                sender.send(json.dumps({"error": "El mensaje es demasiado largo"}))
                 continue
 
-            new_message = models.Message(
-                sender_id=user_id,
-                receiver_id=receiver_id,
-                consultation_id=consultation_id,
-                content=content
-            )
-            db.add(new_message)
-            db.commit()
-            db.refresh(new_message)
-
-            await send_message_to_user(receiver_id, {
-                "id": new_message.id,
+            # Se entrega ya; el INSERT lo hace el escritor diferido en el siguiente lote
+            message_writer.enqueue({
+                "id": message_id,
                 "sender_id": user_id,
                 "receiver_id": receiver_id,
                 "consultation_id": consultation_id,
                 "content": content,
-                "created_at": new_message.created_at.isoformat(),
-                "sender": {"username": user.username}
+                "is_read": False,
+                "created_at": created_at,
             })
+            try:
+                await publish(event)
+            except Exception:
+                # El mensaje ya está en cola para guardarse: aparecerá en el historial
+                logger.exception("No se pudo publicar el mensaje %s", message_id)
+                sender.send(json.dumps({"error": "Mensaje guardado pero no entregado en tiempo real"}))
+            # Con la consulta en caché el bucle puede no ceder nunca el control si el cliente
+            # envía una ráfaga; cedemos para que las colas de salida se vacíen entre mensajes
+            await asyncio.sleep(0)
 
     except WebSocketDisconnect:
-        active_connections[user_id].remove(websocket)
-        if not active_connections[user_id]:
-            del active_connections[user_id]
+        pass
+    except RuntimeError:
+        if not sender.closed:  # si lo cerró SocketSender (cliente lento), recibir falla: no es un error
+            raise
+    finally:
+        _unregister(user_id, sender)
+        await sender.aclose()
 
 @router.get("/consultation/{consultation_id}", response_model=List[dict])
 def get_message_history_by_consultation(
@@ -100,7 +212,7 @@ def get_message_history_by_consultation(
         models.Message.consultation_id == consultation_id
     ).order_by(models.Message.created_at).all()
 
-    return [{
+    history = [{
         "id": m.id,
         "sender_id": m.sender_id,
         "receiver_id": m.receiver_id,
@@ -108,4 +220,23 @@ def get_message_history_by_consultation(
         "content": m.content,
         "created_at": m.created_at.isoformat(),
         "sender": {"username": m.sender.username}
-    } for m in messages]
\ No newline at end of file
+    } for m in messages]
+
+    # Mensajes ya entregados que el escritor diferido de este proceso aún no ha volcado
+    stored_ids = {m.id for m in messages}
+    pending = [row for row in message_writer.pending_for(consultation_id) if row["id"] not in stored_ids]
+    if pending:
+        usernames = dict(db.query(models.User.id, models.User.username).filter(
+            models.User.id.in_({row["sender_id"] for row in pending})
+        ).all())
+        history.extend({
+            "id": row["id"],
+            "sender_id": row["sender_id"],
+            "receiver_id": row["receiver_id"],
+            "consultation_id": row["consultation_id"],
+            "content": row["content"],
+            "created_at": row["created_at"].isoformat(),
+            "sender": {"username": usernames.get(row["sender_id"])}
+        } for row in pending)
+        history.sort(key=lambda m: (m["created_at"], m["id"]))
+    return history
\ No newline at end of file
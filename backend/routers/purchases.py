@@ -1,40 +1,76 @@
 # backend/routers/purchases.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session, selectinload
 from backend.database.database import get_db
 from backend import models
-from backend.security.oauth2 import get_current_user
-from backend.schemas.purchase import PurchaseCreate, PurchaseOut
-from datetime import datetime
-import uuid
-import os
+from backend.models.purchase import INVOICE_NUMBER_SEQUENCE
+from backend.security.oauth2 import get_current_admin, get_current_user
+from backend.schemas.purchase import PurchaseCreate, PurchaseHistoryPage, PurchaseOut
+from backend.utils.cache import bump_version
+from backend.utils.http_cache import is_not_modified
+from backend.utils.idempotency import claim_idempotency_key, store_idempotent_response
+from backend.utils.invoices import ensure_invoice, invoice_path, iter_invoices_zip, render_invoice, store_invoice
+from backend.utils.pagination import keyset_page
+from backend.utils.reservations import reserved_by_others
+from backend.utils.sequences import SequenceBlockAllocator
+from typing import Optional
+from datetime import date, datetime, time, timedelta
+import gzip
 
 router = APIRouter()
 
-def generate_invoice_number() -> str:
-    return f"INV-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+invoice_numbers = SequenceBlockAllocator(INVOICE_NUMBER_SEQUENCE)
+
+def generate_invoice_number(db: Session) -> str:
+    # Secuencia de PostgreSQL (contador en sequence_counters con SQLite): sin colisiones ni reintentos;
+    # 10 dígitos para que ordenen como texto
+    return f"INV-{datetime.now().strftime('%Y%m%d')}-{invoice_numbers.next_value(db):010d}"
 
 @router.post("/checkout", response_model=PurchaseOut)
 def checkout(
     purchase_: PurchaseCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
     if current_user.id != purchase_.user_id:
         raise HTTPException(status_code=403, detail="No autorizado")
+    # 🔁 Reintento de una compra ya hecha: se devuelve la respuesta original
+    claim = claim_idempotency_key(db, current_user.id, idempotency_key, "checkout", purchase_.model_dump())
+    if isinstance(claim, Response):
+        return claim
+    # Cantidades agregadas por accesorio (el mismo producto puede venir en varias líneas)
+    quantities: dict[int, int] = {}
+    for item in purchase_.items:
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail="La cantidad debe ser mayor que 0.")
+        quantities[item.accessory_id] = quantities.get(item.accessory_id, 0) + item.quantity
+
+    # 🔒 Un único SELECT ... WHERE id IN (...) FOR UPDATE, ordenado por id: todas las
+    # transacciones bloquean las filas en el mismo orden (sin deadlocks) y nadie puede
+    # vender el mismo stock entre la comprobación y el descuento.
+    accessories = db.query(models.Accessory)\
+        .filter(models.Accessory.id.in_(quantities))\
+        .order_by(models.Accessory.id)\
+        .with_for_update()\
+        .all()
+    accessories_by_id = {accessory.id: accessory for accessory in accessories}
+    # Lo que otros tienen reservado en su carrito no se puede vender; lo del propio usuario sí
+    reserved = reserved_by_others(db, quantities, current_user.id)
+
     total = 0.0
     purchase_items = []
-    for item in purchase_.items:
-        accessory = db.query(models.Accessory).filter(models.Accessory.id == item.accessory_id).first()
-        if not accessory or accessory.stock < item.quantity:
+    for accessory_id, quantity in quantities.items():
+        accessory = accessories_by_id.get(accessory_id)
+        if not accessory or accessory.stock - reserved.get(accessory_id, 0) < quantity:
             raise HTTPException(
                 status_code=400,
                 detail=f"Stock insuficiente para {accessory.name if accessory else 'producto'}"
             )
-        total += accessory.price * item.quantity
-        purchase_items.append((accessory, item.quantity))
-    invoice_num = generate_invoice_number()
+        total += accessory.price * quantity
+        purchase_items.append((accessory, quantity))
+    invoice_num = generate_invoice_number(db)
     purchase = models.Purchase(
         user_id=current_user.id,
         total_amount=total,
@@ -51,13 +87,60 @@ def checkout(
         )
         accessory.stock -= qty
         db.add(db_item)
+    # ✅ La compra consume las reservas: se retiran del carrito las líneas pagadas
+    db.query(models.CartItem).filter(
+        models.CartItem.user_id == current_user.id,
+        models.CartItem.accessory_id.in_(quantities)
+    ).delete(synchronize_session=False)
+    db.flush()
+    # 📄 Factura renderizada ya con los datos en memoria (sin consultas extra)
+    purchase.invoice_hash = store_invoice(render_invoice(
+        invoice_num, purchase.created_at, current_user.username, current_user.email,
+        [(accessory.name, qty, accessory.price) for accessory, qty in purchase_items],
+    ))
+    response = PurchaseOut.model_validate(purchase).model_dump(mode="json")
+    store_idempotent_response(claim, 200, response)  # misma transacción que la compra
     db.commit()
-    db.refresh(purchase)
-    return purchase
+    bump_version("accessories")  # el checkout descuenta stock
+    return response
+
+@router.get("/me", response_model=PurchaseHistoryPage)
+def get_my_purchases(
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor opaco devuelto en next_cursor"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Tres consultas por página sea cual sea su tamaño: compras, líneas y accesorios (selectinload)
+    query = db.query(models.Purchase)\
+        .options(selectinload(models.Purchase.items).selectinload(models.PurchaseItem.accessory))\
+        .filter(models.Purchase.user_id == current_user.id)
+    purchases, next_cursor = keyset_page(
+        query, models.Purchase.created_at, models.Purchase.id, "created_at.desc",
+        limit, after, datetime.fromisoformat, descending=True,
+    )
+    return {"items": purchases, "next_cursor": next_cursor}
+
+@router.get("/invoices/export")
+def export_invoices(
+    start: date,
+    end: date = Query(..., description="Último día incluido"),
+    _admin: models.User = Depends(get_current_admin)
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="La fecha final no puede ser anterior a la inicial")
+    # 📦 ZIP generado factura a factura mientras se descarga (memoria constante)
+    chunks = iter_invoices_zip(datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min))
+    return StreamingResponse(
+        chunks,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="facturas_{start}_{end}.zip"'}
+    )
 
 @router.get("/{purchase_id}/invoice")
 def download_invoice(
     purchase_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -67,65 +150,21 @@ def download_invoice(
     if purchase.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="No autorizado")
 
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Factura {purchase.invoice_number}</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 40px; }}
-            .header {{ text-align: center; margin-bottom: 30px; }}
-            .header h1 {{ color: #0066cc; }}
-            table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-            th, td {{ border: 1px solid #ccc; padding: 10px; text-align: left; }}
-            .total {{ font-weight: bold; font-size: 1.2em; margin-top: 20px; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>FACTURA</h1>
-            <p><strong>Número:</strong> {purchase.invoice_number}</p>
-            <p><strong>Fecha:</strong> {purchase.created_at.strftime('%d/%m/%Y %H:%M')}</p>
-        </div>
-        <p><strong>Cliente:</strong> {current_user.username} ({current_user.email})</p>
-        <table>
-            <thead>
-                <tr>
-                    <th>Producto</th>
-                    <th>Cantidad</th>
-                    <th>Precio Unitario</th>
-                    <th>Total</th>
-                </tr>
-            </thead>
-            <tbody>
-    """
-    total_general = 0
-    for item in purchase.items:
-        total_item = item.quantity * item.price_at_purchase
-        total_general += total_item
-        html_content += f"""
-                <tr>
-                    <td>{item.accessory.name}</td>
-                    <td>{item.quantity}</td>
-                    <td>${item.price_at_purchase:,.2f}</td>
-                    <td>${total_item:,.2f}</td>
-                </tr>
-        """
-    html_content += f"""
-            </tbody>
-        </table>
-        <div class="total">Total: ${total_general:,.2f}</div>
-        <p>¡Gracias por tu compra!</p>
-    </body>
-    </html>
-    """
-
-    # ✅ Devolver HTML como archivo descargable
-    return Response(
-        content=html_content,
-        media_type="text/html",
-        headers={
-            "Content-Disposition": f'attachment; filename="factura_{purchase.invoice_number}.html"'
-        }
-    )
\ No newline at end of file
+    # 📄 Renderizada una vez (en el checkout o en la primera descarga) y servida desde disco
+    invoice_hash = ensure_invoice(db, purchase)
+    etag = f'"{invoice_hash}"'  # contenido inmutable: ETag fuerte
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": f'attachment; filename="factura_{purchase.invoice_number}.html"',
+        "Vary": "Accept-Encoding",
+    }
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    path = invoice_path(invoice_hash)
+    if "gzip" not in request.headers.get("accept-encoding", ""):
+        # Cliente sin gzip (raro): se descomprime al vuelo
+        with open(path, "rb") as f:
+            return Response(content=gzip.decompress(f.read()), media_type="text/html", headers=headers)
+    headers["Content-Encoding"] = "gzip"
+    return FileResponse(path, media_type="text/html", headers=headers)
@@ -1,14 +1,40 @@
 # backend/routers/user_car_gallery.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 from backend.database.database import get_db
 from backend import models
 from backend.schemas.user_car_gallery import UserCarGalleryCreate, UserCarGalleryOut
 from backend.security.oauth2 import get_current_user
+from backend.utils.http_cache import (
+    is_not_modified, make_validators, not_modified_response, request_scope, validator_headers,
+)
 
 router = APIRouter()
 
+def _gallery_validators(request: Request, response: Response, query, scope: str = ""):
+    """Calcula ETag/Last-Modified con max(updated_at) y COUNT sobre `query`.
+
+    La respuesta incrusta al dueño de cada entrada (UserOut), así que también cuenta
+    el updated_at de esos usuarios: cambiar el nombre invalida las galerías cacheadas.
+    Devuelve una respuesta 304 si el cliente ya tiene esta versión; si no,
+    deja las cabeceras puestas en `response` y devuelve None.
+    """
+    gallery_modified, owner_modified, count = query\
+        .outerjoin(models.User, models.User.id == models.UserCarGallery.user_id)\
+        .with_entities(
+            func.max(models.UserCarGallery.updated_at),
+            func.max(models.User.updated_at),
+            func.count(models.UserCarGallery.id),
+        ).one()
+    last_modified = max(filter(None, (gallery_modified, owner_modified)), default=None)
+    etag, last_modified = make_validators(request_scope(request) + scope, last_modified, count)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    return None
+
 @router.post("/", response_model=UserCarGalleryOut, status_code=status.HTTP_201_CREATED)
 def create_user_car_gallery_entry(entry: UserCarGalleryCreate, db: Session = Depends(get_db)):
     db_entry = models.user_car_gallery.UserCarGallery(**entry.dict())
@@ -18,7 +44,10 @@ def create_user_car_gallery_entry(entry: UserCarGalleryCreate, db: Session = Dep
     return db_entry
 
 @router.get("/", response_model=List[UserCarGalleryOut])
-def get_all_user_car_gallery_entries(db: Session = Depends(get_db)):
+def get_all_user_car_gallery_entries(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = _gallery_validators(request, response, db.query(models.UserCarGallery))
+    if not_modified:
+        return not_modified
     entries = db.query(models.user_car_gallery.UserCarGallery).options(
         joinedload(models.user_car_gallery.UserCarGallery.user)
     ).all()
@@ -27,9 +56,18 @@ def get_all_user_car_gallery_entries(db: Session = Depends(get_db)):
 # ✅ SOLO LAS DEL USUARIO ACTUAL (CORREGIDO)
 @router.get("/me", response_model=List[UserCarGalleryOut])
 def get_current_user_gallery(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    not_modified = _gallery_validators(
+        request, response,
+        db.query(models.UserCarGallery).filter(models.UserCarGallery.user_id == current_user.id),
+        scope=f"#user={current_user.id}",  # misma URL, distinto contenido por usuario
+    )
+    if not_modified:
+        return not_modified
     entries = (
         db.query(models.UserCarGallery)
         .filter(models.UserCarGallery.user_id == current_user.id)
@@ -39,7 +77,13 @@ def get_current_user_gallery(
     return entries
 
 @router.get("/{entry_id}", response_model=UserCarGalleryOut)
-def get_user_car_gallery_entry(entry_id: int, db: Session = Depends(get_db)):
+def get_user_car_gallery_entry(entry_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = _gallery_validators(
+        request, response,
+        db.query(models.UserCarGallery).filter(models.UserCarGallery.id == entry_id),
+    )
+    if not_modified:
+        return not_modified
     entry = db.query(models.user_car_gallery.UserCarGallery).options(
         joinedload(models.user_car_gallery.UserCarGallery.user)
     ).filter(models.user_car_gallery.UserCarGallery.id == entry_id).first()
@@ -1,9 +1,9 @@
 from .user import UserCreate, UserOut, UserUpdate
 from .consultation import ConsultationCreate, ConsultationOut
-from .car import CarCreate, CarOut, CarUpdate
+from .car import CarCreate, CarOut, CarUpdate, CarPage, CarFacets, CarSummaryOut
 from .accessory import AccessoryCreate, AccessoryOut, AccessoryUpdate
 from .user_car_gallery import UserCarGalleryCreate, UserCarGalleryOut
-from .cart_item import CartItemCreate, CartItemOut, CartItemUpdate 
+from .cart_item import CartItemCreate, CartItemOut, CartItemUpdate, CartLineIn, AccessoryAvailabilityOut
 
 
 __all__ = [
@@ -16,6 +16,9 @@ __all__ = [
     "CarBase",
     "CarCreate",
     "CarOut",
+    "CarPage",
+    "CarFacets",
+    "CarSummaryOut",
     "AccessoryBase",
     "AccessoryCreate",
     "AccessoryOut",
@@ -24,4 +27,6 @@ __all__ = [
     "CartItemCreate",   
     "CartItemOut",     
     "CartItemUpdate",
+    "CartLineIn",
+    "AccessoryAvailabilityOut",
 ]
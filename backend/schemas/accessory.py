@@ -14,6 +14,7 @@ class AccessoryCreate(BaseModel):
     stock: int = 0
     is_published: bool = True
     created_by: Optional[int] = None
+    external_id: Optional[str] = Field(None, max_length=100)  # clave del proveedor para el upsert masivo
 
 # Esquema para la lectura de un accesorio (AccessoryOut)
 class AccessoryOut(AccessoryCreate):
@@ -34,4 +35,5 @@ class AccessoryUpdate(BaseModel):
     category: Optional[str] = None
     stock: Optional[int] = None
     is_published: Optional[bool] = None
-    deleted_at: Optional[datetime] = None
\ No newline at end of file
+    deleted_at: Optional[datetime] = None
+    external_id: Optional[str] = Field(None, max_length=100)
\ No newline at end of file
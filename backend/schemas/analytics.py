@@ -0,0 +1,27 @@
+# backend/schemas/analytics.py
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Optional
+
+class DailyRevenueOut(BaseModel):
+    day: date
+    orders: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class CategoryRevenueOut(BaseModel):
+    category: str
+    units: int
+    revenue: float
+
+class TopSellerOut(BaseModel):
+    accessory_id: int
+    name: str
+    units: int
+    revenue: float
+
+class RollupStatusOut(BaseModel):
+    last_purchase_id: int
+    updated_at: Optional[datetime] = None
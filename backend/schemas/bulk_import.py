@@ -0,0 +1,12 @@
+# backend/schemas/bulk_import.py
+from pydantic import BaseModel
+from typing import Any, List
+
+class BulkRowError(BaseModel):
+    index: int          # posición de la fila en el lote enviado
+    errors: List[Any]   # errores de validación de Pydantic o de la base de datos
+
+class BulkImportResult(BaseModel):
+    received: int
+    upserted: int
+    errors: List[BulkRowError]
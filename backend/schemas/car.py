@@ -1,6 +1,7 @@
 # backend/schemas/car.py
-from pydantic import BaseModel, Field
-from typing import Optional, List, Any
+from pydantic import BaseModel, Field, create_model, field_validator
+from typing import Optional, List, Any, Type
+from functools import lru_cache
 from datetime import datetime
 
 # Esquema para la creación de un coche (CarCreate)
@@ -24,6 +25,7 @@ class CarCreate(BaseModel):
     production_years: Optional[str] = Field(None, max_length=20)
     is_published: bool = True
     created_by: Optional[int] = None
+    external_id: Optional[str] = Field(None, max_length=100)  # clave del feed para el upsert masivo
 
 # Esquema para la lectura de un coche (CarOut)
 class CarOut(CarCreate):
@@ -55,4 +57,66 @@ class CarUpdate(BaseModel):
     weight: Optional[str] = Field(None, max_length=20)
     production_years: Optional[str] = Field(None, max_length=20)
     is_published: Optional[bool] = None
-    deleted_at: Optional[datetime] = None
\ No newline at end of file
+    deleted_at: Optional[datetime] = None
+    external_id: Optional[str] = Field(None, max_length=100)
+
+# Esquema para una página del catálogo con paginación por cursor (CarPage)
+class CarPage(BaseModel):
+    items: List[CarOut]
+    next_cursor: Optional[str] = None
+
+
+# Esquema compacto por defecto para los listados (CarSummaryOut): solo lo que pinta la grilla
+class CarSummaryOut(BaseModel):
+    id: int
+    brand: str
+    model: str
+    year: int
+    price: float
+    image_url: Optional[List[str]] = None  # solo la primera imagen
+
+    @field_validator("image_url", mode="before")
+    @classmethod
+    def first_image_only(cls, value):
+        return value[:1] if value else value
+
+    class Config:
+        from_attributes = True
+
+class CarSummaryPage(BaseModel):
+    items: List[CarSummaryOut]
+    next_cursor: Optional[str] = None
+
+# Campos de CarOut que se pueden pedir con `fields=`; `id` siempre se incluye
+CAR_FIELDS = tuple(CarOut.model_fields)
+
+@lru_cache(maxsize=128)
+def car_fields_models(fields: tuple) -> tuple[Type[BaseModel], Type[BaseModel]]:
+    """Modelos (ítem, página) con solo los campos de CarOut pedidos, en su orden original."""
+    item = create_model(
+        "CarFieldsOut",
+        __config__={"from_attributes": True},
+        **{name: (CarOut.model_fields[name].annotation, CarOut.model_fields[name].default) for name in fields},
+    )
+    page = create_model("CarFieldsPage", items=(List[item], ...), next_cursor=(Optional[str], None))
+    return item, page
+
+# Esquemas para los conteos por faceta del catálogo (CarFacets)
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+# Tramo semiabierto [min, max): el valor max ya pertenece al tramo siguiente
+class RangeFacetCount(BaseModel):
+    min: int
+    max: int
+    count: int
+
+class CarFacets(BaseModel):
+    total: int
+    brand: List[FacetCount]
+    fuel_type: List[FacetCount]
+    transmission: List[FacetCount]
+    drive_train: List[FacetCount]
+    year: List[RangeFacetCount]
+    price: List[RangeFacetCount]
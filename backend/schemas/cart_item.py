@@ -15,10 +15,23 @@ class CartItemCreate(CartItemBase):
 class CartItemUpdate(BaseModel):
     quantity: Optional[int] = None
 
+class CartLineIn(BaseModel):
+    """Línea del carrito completo que se envía a PUT /api/cart/{user_id}."""
+    accessory_id: int
+    quantity: int = 1
+
 class CartItemOut(CartItemBase):
     id: int
     created_at: datetime
+    reserved_until: Optional[datetime] = None
     # ✅ ¡CLAVE! Incluimos el objeto completo del accesorio, no solo su ID
     accessory: AccessoryOut
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class AccessoryAvailabilityOut(BaseModel):
+    accessory_id: int
+    stock: int
+    reserved: int
+    available: int
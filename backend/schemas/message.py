@@ -0,0 +1,16 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional
+
+# Mensaje que el cliente envía por el WebSocket del chat
+class ChatMessageIn(BaseModel):
+    receiver_id: int
+    content: str
+    consultation_id: Optional[int] = None
+
+    @field_validator("content")
+    @classmethod
+    def reject_nul_characters(cls, value: str) -> str:
+        # PostgreSQL no admite NUL en columnas de texto: el INSERT diferido fallaría después
+        if "\x00" in value:
+            raise ValueError("El mensaje contiene caracteres no válidos")
+        return value
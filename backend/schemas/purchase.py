@@ -1,6 +1,6 @@
 # backend/schemas/purchase.py
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 class PurchaseItemCreate(BaseModel):
@@ -28,4 +28,31 @@ class PurchaseOut(BaseModel):
     items: List[PurchaseItemOut]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Historial de compras (GET /api/purchases/me): líneas con el accesorio resumido
+class PurchasedAccessoryOut(BaseModel):
+    id: int
+    name: str
+    image_url: Optional[str] = None
+    category: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class PurchaseHistoryItemOut(PurchaseItemOut):
+    accessory: PurchasedAccessoryOut
+
+class PurchaseHistoryOut(BaseModel):
+    id: int
+    total_amount: float
+    invoice_number: str
+    created_at: datetime
+    items: List[PurchaseHistoryItemOut]
+
+    class Config:
+        from_attributes = True
+
+class PurchaseHistoryPage(BaseModel):
+    items: List[PurchaseHistoryOut]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,72 @@
+# backend/tests/conftest.py
+# Las pruebas corren sobre un SQLite temporal: se fija antes de importar la app.
+# Solo se crean las tablas que no usan tipos exclusivos de PostgreSQL (Car usa ARRAY).
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}")
+os.environ.setdefault("RUN_BACKGROUND_JOBS", "false")
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from backend import models
+from backend.database.database import Base, SessionLocal, engine
+from backend.routers import messages
+from backend.utils.message_writer import MessageWriter
+
+CHAT_TABLES = [
+    models.Role.__table__, models.User.__table__, models.Consultation.__table__, models.Message.__table__,
+    models.SequenceCounter.__table__,
+]
+
+
+@pytest.fixture
+def chat_db():
+    """Tablas del chat vacías + un usuario, su asesor y una consulta entre ambos."""
+    Base.metadata.drop_all(engine, tables=CHAT_TABLES)
+    Base.metadata.create_all(engine, tables=CHAT_TABLES)
+    with SessionLocal() as db:
+        user = models.User(username="cliente", email="cliente@test.local", password_hash="-")
+        advisor = models.User(username="asesor", email="asesor@test.local", password_hash="-")
+        db.add_all([user, advisor])
+        db.flush()
+        consultation = models.Consultation(message="hola", user_id=user.id, advisor_id=advisor.id, status="responded")
+        db.add(consultation)
+        db.commit()
+        yield {"user_id": user.id, "advisor_id": advisor.id, "consultation_id": consultation.id}
+    Base.metadata.drop_all(engine, tables=CHAT_TABLES)
+
+
+@pytest.fixture
+def writer(chat_db, tmp_path, monkeypatch):
+    """Escritor diferido con ficheros temporales; también sustituye al del endpoint del chat."""
+    writer = MessageWriter(flush_interval=60, spool_path=str(tmp_path / "messages.jsonl"),
+                           dead_letter_path=str(tmp_path / "messages.dead.jsonl"))
+    monkeypatch.setattr(messages, "message_writer", writer)
+    return writer
+
+
+class FakeWebSocket:
+    """Lo mínimo de WebSocket que usa el endpoint del chat, sobre colas en memoria."""
+
+    def __init__(self):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.sent: asyncio.Queue = asyncio.Queue()
+        self.close_code = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+
+    async def receive_text(self) -> str:
+        data = await self.inbox.get()
+        if data is None:
+            raise WebSocketDisconnect(1000)
+        return data
+
+    async def send_text(self, data: str) -> None:
+        await self.sent.put(data)
@@ -0,0 +1,38 @@
+# backend/tests/test_car_facets.py
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Integer, Numeric, create_engine, literal, select
+from sqlalchemy.dialects import postgresql
+
+from backend.routers.cars import facet_bucket_start
+
+
+@pytest.mark.parametrize("value, size, expected", [
+    (2019, 10, 2010),
+    (2020, 10, 2020),
+    (2024, 5, 2020),
+    (2025, 5, 2025),
+])
+def test_year_bucket_boundaries(value, size, expected):
+    with create_engine("sqlite://").connect() as conn:
+        assert conn.scalar(select(facet_bucket_start(literal(value, Integer), size))) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (Decimal("0"), 0),
+    (Decimal("49999.99"), 0),
+    (Decimal("50000"), 50000),
+    (Decimal("149999.99"), 100000),
+    (Decimal("150000"), 150000),
+])
+def test_price_bucket_boundaries(value, expected):
+    with create_engine("sqlite://").connect() as conn:
+        assert conn.scalar(select(facet_bucket_start(literal(value, Numeric(12, 2)), 50000))) == expected
+
+
+def test_bucket_uses_floor_on_postgres():
+    # CAST(x AS INTEGER) redondea en PostgreSQL: el tramo debe salir de floor()
+    sql = str(select(facet_bucket_start(literal(Decimal("149999.99"), Numeric(12, 2)), 50000))
+              .compile(dialect=postgresql.dialect()))
+    assert "floor(" in sql.lower()
@@ -0,0 +1,141 @@
+# backend/tests/test_chat_socket.py
+import asyncio
+import json
+import threading
+
+from backend.routers import messages
+from backend.utils import broker
+from backend.utils.broker import POSTGRES_MAX_PAYLOAD_BYTES, MemoryBroker
+from backend.tests.conftest import FakeWebSocket
+
+
+def test_malformed_frames_get_an_error_and_keep_the_socket_open(chat_db, writer):
+    frames = [
+        "esto no es JSON",
+        json.dumps({"content": "sin receptor", "consultation_id": chat_db["consultation_id"]}),
+        json.dumps({"receiver_id": "abc", "content": "hola", "consultation_id": chat_db["consultation_id"]}),
+        json.dumps({"receiver_id": chat_db["advisor_id"], "content": 5, "consultation_id": chat_db["consultation_id"]}),
+        json.dumps(["no", "es", "un", "objeto"]),
+    ]
+
+    async def scenario():
+        ws = FakeWebSocket()
+        task = asyncio.create_task(messages.websocket_endpoint(ws, chat_db["user_id"]))
+        for frame in frames:
+            ws.inbox.put_nowait(frame)
+        replies = [json.loads(await asyncio.wait_for(ws.sent.get(), 5)) for _ in frames]
+        ws.inbox.put_nowait(None)
+        await asyncio.wait_for(task, 5)
+        return ws, replies
+
+    ws, replies = asyncio.run(scenario())
+    assert replies == [{"error": "Mensaje inválido"}] * len(frames)
+    assert ws.close_code is None
+
+
+def test_nul_character_is_rejected_before_enqueue(chat_db, writer):
+    async def scenario():
+        ws = FakeWebSocket()
+        task = asyncio.create_task(messages.websocket_endpoint(ws, chat_db["user_id"]))
+        ws.inbox.put_nowait(json.dumps({
+            "receiver_id": chat_db["advisor_id"], "content": "a\x00b", "consultation_id": chat_db["consultation_id"],
+        }))
+        reply = json.loads(await asyncio.wait_for(ws.sent.get(), 5))
+        ws.inbox.put_nowait(None)
+        await asyncio.wait_for(task, 5)
+        return reply
+
+    assert asyncio.run(scenario()) == {"error": "Mensaje inválido"}
+    assert writer.pending_for(chat_db["consultation_id"]) == []
+
+
+def test_consultation_change_during_authorization_is_not_cached(chat_db, writer, monkeypatch):
+    # El cambio llega mientras la validación sigue en su hilo: su resultado no debe quedar en caché
+    started, release = threading.Event(), threading.Event()
+
+    def slow_authorize(user_id, receiver_id, consultation_id):
+        started.set()
+        release.wait(5)
+        return 1000
+
+    monkeypatch.setattr(messages, "_authorize_message", slow_authorize)
+
+    async def scenario():
+        ws = FakeWebSocket()
+        task = asyncio.create_task(messages.websocket_endpoint(ws, chat_db["user_id"]))
+        ws.inbox.put_nowait(json.dumps({
+            "receiver_id": chat_db["advisor_id"], "content": "hola", "consultation_id": chat_db["consultation_id"],
+        }))
+        await asyncio.to_thread(started.wait, 5)
+        [sender] = messages.active_connections[chat_db["user_id"]]
+        await messages._forget_consultation({"type": "consultation.changed", "consultation_id": chat_db["consultation_id"]})
+        release.set()
+        while not writer.pending_for(chat_db["consultation_id"]):
+            await asyncio.sleep(0.01)
+        authorized = dict(sender.authorized)
+        ws.inbox.put_nowait(None)
+        await asyncio.wait_for(task, 5)
+        await writer.stop()
+        return authorized
+
+    assert asyncio.run(scenario()) == {}
+
+
+class LimitedBroker(MemoryBroker):
+    max_payload_bytes = POSTGRES_MAX_PAYLOAD_BYTES
+
+
+class BrokenBroker(MemoryBroker):
+    async def publish(self, event: dict) -> None:
+        raise ConnectionError("broker caído")
+
+
+def drain(queue: asyncio.Queue) -> list:
+    return [json.loads(queue.get_nowait()) for _ in range(queue.qsize())]
+
+
+def chat_scenario(chat_db, frames):
+    """Envía `frames` del usuario al asesor; devuelve (respuestas al emisor, recibidos por el asesor)."""
+    async def scenario():
+        user_ws, advisor_ws = FakeWebSocket(), FakeWebSocket()
+        tasks = [
+            asyncio.create_task(messages.websocket_endpoint(user_ws, chat_db["user_id"])),
+            asyncio.create_task(messages.websocket_endpoint(advisor_ws, chat_db["advisor_id"])),
+        ]
+        await asyncio.sleep(0.05)
+        for frame in frames:
+            user_ws.inbox.put_nowait(json.dumps({
+                "receiver_id": chat_db["advisor_id"], "content": frame, "consultation_id": chat_db["consultation_id"],
+            }))
+        await asyncio.sleep(0.3)
+        for ws in (user_ws, advisor_ws):
+            ws.inbox.put_nowait(None)
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        return drain(user_ws.sent), drain(advisor_ws.sent)
+
+    return asyncio.run(scenario())
+
+
+def test_non_ascii_message_fits_in_notify(chat_db, writer, monkeypatch):
+    # 560 emojis: con el payload escapado dos veces superaba los 8000 bytes de NOTIFY
+    monkeypatch.setattr(broker, "_broker", LimitedBroker())
+    replies, received = chat_scenario(chat_db, ["🚗" * 560])
+    assert replies == []
+    assert [message["content"] for message in received] == ["🚗" * 560]
+
+
+def test_oversized_event_is_rejected_before_enqueue(chat_db, writer, monkeypatch):
+    monkeypatch.setattr(LimitedBroker, "max_payload_bytes", 1000)
+    monkeypatch.setattr(broker, "_broker", LimitedBroker())
+    replies, received = chat_scenario(chat_db, ["🚗" * 300, "corto"])
+    assert replies == [{"error": "El mensaje es demasiado largo"}]
+    assert [message["content"] for message in received] == ["corto"]
+    assert [row["content"] for row in writer.pending_for(chat_db["consultation_id"])] == ["corto"]
+
+
+def test_broker_failure_keeps_the_socket_open(chat_db, writer, monkeypatch):
+    monkeypatch.setattr(broker, "_broker", BrokenBroker())
+    replies, received = chat_scenario(chat_db, ["uno", "dos"])
+    assert replies == [{"error": "Mensaje guardado pero no entregado en tiempo real"}] * 2
+    assert received == []
+    assert [row["content"] for row in writer.pending_for(chat_db["consultation_id"])] == ["uno", "dos"]
@@ -0,0 +1,42 @@
+# backend/tests/test_gallery_cache.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import models
+from backend.database.database import Base, SessionLocal, engine
+from backend.routers import user_car_gallery
+
+GALLERY_TABLES = [models.Role.__table__, models.User.__table__, models.UserCarGallery.__table__]
+
+
+@pytest.fixture
+def client():
+    Base.metadata.drop_all(engine, tables=GALLERY_TABLES)
+    Base.metadata.create_all(engine, tables=GALLERY_TABLES)
+    with SessionLocal() as db:
+        owner = models.User(username="piloto", email="piloto@example.com", password_hash="-")
+        db.add(owner)
+        db.flush()
+        db.add(models.UserCarGallery(car_name="Supra", image_url="/supra.jpg", user_id=owner.id))
+        db.commit()
+    app = FastAPI()
+    app.include_router(user_car_gallery.router, prefix="/gallery")
+    yield TestClient(app)
+    Base.metadata.drop_all(engine, tables=GALLERY_TABLES)
+
+
+def test_gallery_etag_changes_when_the_owner_changes(client):
+    first = client.get("/gallery/")
+    etag = first.headers["etag"]
+    assert client.get("/gallery/", headers={"If-None-Match": etag}).status_code == 304
+
+    # La galería no cambia, pero incrusta al dueño: su nuevo nombre debe invalidar la caché
+    with SessionLocal() as db:
+        db.query(models.User).one().username = "piloto2"
+        db.commit()
+
+    second = client.get("/gallery/", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.json()[0]["user"]["username"] == "piloto2"
+    assert second.headers["etag"] != etag
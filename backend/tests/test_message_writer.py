@@ -0,0 +1,112 @@
+# backend/tests/test_message_writer.py
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from backend import models
+from backend.database.database import SessionLocal
+from backend.utils.message_writer import MessageWriter
+
+
+def make_row(chat_db, message_id, content="hola"):
+    return {
+        "id": message_id,
+        "sender_id": chat_db["user_id"],
+        "receiver_id": chat_db["advisor_id"],
+        "consultation_id": chat_db["consultation_id"],
+        "content": content,
+        "is_read": False,
+        "created_at": datetime(2026, 1, 1, 12, 0, 0),
+    }
+
+
+def stored_ids():
+    with SessionLocal() as db:
+        return sorted(id_ for (id_,) in db.query(models.Message.id))
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_poison_row_goes_to_dead_letter_and_the_rest_is_saved(chat_db, writer):
+    # content NULL viola NOT NULL: el lote falla, y solo esa fila debe apartarse
+    rows = [make_row(chat_db, 1), make_row(chat_db, 2, content=None), make_row(chat_db, 3)]
+
+    async def scenario():
+        for row in rows:
+            writer.enqueue(row)
+        await writer.flush()
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert stored_ids() == [1, 3]
+    assert [row["id"] for row in read_lines(writer.dead_letter_path)] == [2]
+    assert not os.path.exists(writer.spool_path)
+
+
+def test_start_replays_spool_and_isolates_poison_rows(chat_db, writer):
+    writer._spool([make_row(chat_db, 10), make_row(chat_db, 11, content=None)])
+    with open(writer.spool_path, "a", encoding="utf-8") as f:
+        f.write("{roto\n")
+
+    async def scenario():
+        await writer.start()
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert stored_ids() == [10]
+    assert [row["id"] for row in read_lines(writer.dead_letter_path)] == [11]
+    assert not os.path.exists(writer.spool_path)
+    # El bloqueo entre workers queda libre y lo siguiente que se respalda va a un fichero nuevo
+    fcntl = pytest.importorskip("fcntl")
+    with open(writer.spool_path + ".lock", "a+b") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)  # BlockingIOError si sigue tomado
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    writer._spool([make_row(chat_db, 12)])
+    assert [row["id"] for row in read_lines(writer.spool_path)] == [12]
+
+
+def test_start_survives_a_failing_replay(chat_db, writer, monkeypatch):
+    def broken_replay():
+        raise RuntimeError("BD caída")
+
+    monkeypatch.setattr(writer, "_replay_spool", broken_replay)
+
+    async def scenario():
+        await writer.start()
+        writer.enqueue(make_row(chat_db, 20))
+        monkeypatch.undo()
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert stored_ids() == [20]
+
+
+def test_stop_flushes_pending_messages(chat_db, writer):
+    async def scenario():
+        for message_id in (30, 31, 32):
+            writer.enqueue(make_row(chat_db, message_id))
+        assert stored_ids() == []  # flush_interval de 60 s: nada se ha volcado aún
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert stored_ids() == [30, 31, 32]
+
+
+def test_workers_sharing_the_spool_replay_it_once(chat_db, writer):
+    # Dos instancias = dos workers: solo los une el bloqueo del sistema sobre el fichero
+    other = MessageWriter(flush_interval=60, spool_path=writer.spool_path, dead_letter_path=writer.dead_letter_path)
+    writer._spool([make_row(chat_db, message_id) for message_id in range(40, 50)])
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        replayed = sorted(pool.map(lambda w: w._replay_spool(), [writer, other]))
+
+    assert replayed == [0, 10]
+    assert stored_ids() == list(range(40, 50))
+    assert not os.path.exists(writer.spool_path)
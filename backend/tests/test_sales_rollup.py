@@ -0,0 +1,68 @@
+# backend/tests/test_sales_rollup.py
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from backend import models
+from backend.database.database import Base, SessionLocal, engine
+from backend.routers.admin_analytics import DateRange, get_top_sellers
+from backend.utils.analytics import DELETED_ACCESSORY, refresh_sales_rollups
+
+SALES_TABLES = [
+    models.Role.__table__, models.User.__table__, models.Accessory.__table__,
+    models.Purchase.__table__, models.PurchaseItem.__table__,
+    models.SalesDaily.__table__, models.SalesDailyAccessory.__table__, models.RollupWatermark.__table__,
+]
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine, tables=SALES_TABLES)
+    Base.metadata.create_all(engine, tables=SALES_TABLES)
+    with SessionLocal() as db:
+        yield db
+    Base.metadata.drop_all(engine, tables=SALES_TABLES)
+
+
+def _sell(db, accessory_id: int, quantity: int, price: float, number: str) -> None:
+    # Compra de ayer: queda fuera del retraso ANALYTICS_ROLLUP_LAG_SECONDS
+    purchase = models.Purchase(user_id=1, total_amount=quantity * price, invoice_number=number,
+                               created_at=datetime.utcnow() - timedelta(days=1))
+    db.add(purchase)
+    db.flush()
+    db.add(models.PurchaseItem(purchase_id=purchase.id, accessory_id=accessory_id,
+                               quantity=quantity, price_at_purchase=price))
+    db.commit()
+
+
+def test_rollup_survives_accessory_deletion(db):
+    accessory = models.Accessory(name="Alerón", price=0.1, category="Exterior")
+    db.add(accessory)
+    db.commit()
+    accessory_id = accessory.id
+    for i in range(3):
+        _sell(db, accessory_id, 1, 0.1, f"F-{i}")
+    refresh_sales_rollups(db)
+
+    db.delete(accessory)
+    db.commit()
+
+    row = db.query(models.SalesDailyAccessory).one()
+    assert (row.accessory_id, row.accessory_name, row.category, row.units) == (accessory_id, "Alerón", "Exterior", 3)
+    # NUMERIC: 3 × 0.1 suma exacto, sin el error de redondeo del float
+    assert row.revenue == Decimal("0.30")
+    assert db.query(models.SalesDaily).one().revenue == Decimal("0.30")
+
+    [top] = get_top_sellers(DateRange(), limit=10, db=db)
+    assert (top.accessory_id, top.name, top.units) == (accessory_id, "Alerón", 3)
+
+
+def test_rollup_counts_items_of_missing_accessory(db):
+    # Una línea cuyo accesorio ya no existe entra igual en los resúmenes (LEFT JOIN)
+    _sell(db, 999, 2, 5.0, "F-1")
+    assert refresh_sales_rollups(db) == 1
+
+    row = db.query(models.SalesDailyAccessory).one()
+    assert (row.accessory_id, row.accessory_name, row.units) == (999, DELETED_ACCESSORY, 2)
+    assert row.revenue == Decimal("10.00")
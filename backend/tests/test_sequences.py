@@ -0,0 +1,38 @@
+# backend/tests/test_sequences.py
+from datetime import datetime
+
+from sqlalchemy import Sequence
+
+from backend import models
+from backend.database.database import SessionLocal
+from backend.utils.sequences import SequenceBlockAllocator
+
+
+def test_sqlite_counter_starts_after_existing_rows(chat_db):
+    with SessionLocal() as db:
+        db.add(models.Message(id=7, sender_id=chat_db["user_id"], receiver_id=chat_db["advisor_id"],
+                              consultation_id=chat_db["consultation_id"], content="hola", created_at=datetime.utcnow()))
+        db.commit()
+    allocator = SequenceBlockAllocator(Sequence("messages_id_seq", increment=50), models.Message.id)
+
+    with SessionLocal() as db:
+        values = [allocator.next_value(db) for _ in range(3)]
+        db.commit()
+    assert values == [8, 9, 10]
+    # Sin bloques en memoria: cada valor sale del contador
+    assert allocator.try_next_value() is None
+
+
+def test_sqlite_counter_is_shared_and_transactional(chat_db):
+    sequence = Sequence("invoice_number_seq", start=1, increment=20)
+    first, second = SequenceBlockAllocator(sequence), SequenceBlockAllocator(sequence)
+
+    with SessionLocal() as db:
+        assert first.next_value(db) == 1
+        db.commit()
+    with SessionLocal() as db:
+        assert second.next_value(db) == 2
+        db.rollback()  # el valor no se usó: se vuelve a repartir
+    with SessionLocal() as db:
+        assert first.next_value(db) == 2
+        db.commit()
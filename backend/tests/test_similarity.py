@@ -0,0 +1,37 @@
+# backend/tests/test_similarity.py
+import numpy as np
+
+from backend.utils.similarity import CarFeatureIndex
+
+RAW = np.array([
+    [2018, 30000, 150, 200, 40000],
+    [2019, 32000, 160, 210, 30000],
+    [2010, 90000, 400, 300, 90000],
+], dtype=np.float64)
+
+
+def counting_index(max_age: float) -> tuple[CarFeatureIndex, list]:
+    index = CarFeatureIndex(max_age=max_age)
+    rebuilds = []
+
+    def rebuild(db):  # en lugar de leer la tabla cars (ARRAY, no existe en SQLite)
+        rebuilds.append(db)
+        index._load(np.array([1, 2, 3]), RAW)
+
+    index._rebuild = rebuild
+    return index, rebuilds
+
+
+def test_index_is_reused_while_fresh():
+    index, rebuilds = counting_index(max_age=3600)
+    assert index.nearest(None, 1, 1) == [2]
+    assert index.nearest(None, 1, 1) == [2]
+    assert len(rebuilds) == 1
+
+
+def test_index_is_rebuilt_once_older_than_max_age():
+    # Sin caché compartida las escrituras de otros workers solo se ven al caducar el índice
+    index, rebuilds = counting_index(max_age=0)
+    index.nearest(None, 1, 1)
+    index.nearest(None, 1, 1)
+    assert len(rebuilds) == 2
@@ -0,0 +1,96 @@
+# backend/utils/analytics.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import Numeric, cast, func, select
+from sqlalchemy.orm import Session
+
+from backend.config import ANALYTICS_ROLLUP_LAG_SECONDS
+from backend.models.accessory import Accessory
+from backend.models.purchase import Purchase
+from backend.models.purchase_item import PurchaseItem
+from backend.models.sales_rollup import RollupWatermark, SalesDaily, SalesDailyAccessory
+from backend.utils.upsert import upsert_insert
+
+SALES_WATERMARK = "sales"
+ROLLUP_BATCH_SIZE = 10000
+UNCATEGORIZED = "Sin categoría"
+DELETED_ACCESSORY = "Accesorio eliminado"
+# Columnas descriptivas del resumen: se guardan, no se suman
+_LABEL_COLUMNS = ("category", "accessory_name")
+
+
+def _day(column):
+    # date() existe en PostgreSQL y en SQLite (CAST AS DATE no sirve en SQLite)
+    return func.date(column)
+
+
+def _accumulate(db: Session, model, keys: list, aggregate):
+    """INSERT ... SELECT agregado ON CONFLICT DO UPDATE sumando a lo ya acumulado."""
+    columns = [c.name for c in aggregate.selected_columns]
+    stmt = upsert_insert(db, model).from_select(columns, aggregate)
+    set_ = {
+        name: getattr(model, name) + stmt.excluded[name]
+        for name in columns if name not in keys and name not in _LABEL_COLUMNS
+    }
+    db.execute(stmt.on_conflict_do_update(index_elements=keys, set_=set_))
+
+
+def refresh_sales_rollups(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """Suma a los resúmenes las compras con id > marca de agua, por lotes de ids.
+
+    Solo entran compras con más de ANALYTICS_ROLLUP_LAG_SECONDS de antigüedad, para
+    que un checkout aún sin confirmar con un id menor no se quede atrás al avanzar la marca.
+    Cada lote (agregados + marca) se confirma junto, así que el job es reanudable y
+    dos workers no suman dos veces (la marca se lee con FOR UPDATE).
+    """
+    processed = 0
+    while True:
+        watermark = db.query(RollupWatermark)\
+            .filter(RollupWatermark.name == SALES_WATERMARK)\
+            .with_for_update()\
+            .first()
+        if watermark is None:
+            watermark = RollupWatermark(name=SALES_WATERMARK, last_id=0)
+            db.add(watermark)
+            db.flush()
+        # El lote acaba justo antes de la primera compra demasiado reciente: la marca
+        # nunca salta por encima de una compra que aún no se ha sumado
+        cutoff = datetime.utcnow() - timedelta(seconds=ANALYTICS_ROLLUP_LAG_SECONDS)
+        last_id = watermark.last_id
+        first_recent = db.query(func.min(Purchase.id))\
+            .filter(Purchase.id > last_id, Purchase.created_at > cutoff)\
+            .scalar()
+        limit_id = last_id + batch_size if first_recent is None else min(last_id + batch_size, first_recent - 1)
+        upper = db.query(func.max(Purchase.id))\
+            .filter(Purchase.id > last_id, Purchase.id <= limit_id)\
+            .scalar()
+        if upper is None:
+            db.commit()
+            return processed
+        in_batch = (Purchase.id > last_id, Purchase.id <= upper)
+
+        _accumulate(db, SalesDaily, ["day"], select(
+            _day(Purchase.created_at).label("day"),
+            func.count(Purchase.id).label("orders"),
+            cast(func.sum(Purchase.total_amount), Numeric(14, 2)).label("revenue"),
+        ).where(*in_batch).group_by(_day(Purchase.created_at)))
+
+        # LEFT JOIN: las ventas de un accesorio ya borrado también cuentan
+        category = func.coalesce(Accessory.category, UNCATEGORIZED)
+        name = func.coalesce(Accessory.name, DELETED_ACCESSORY)
+        _accumulate(db, SalesDailyAccessory, ["day", "accessory_id"], select(
+            _day(Purchase.created_at).label("day"),
+            PurchaseItem.accessory_id.label("accessory_id"),
+            func.max(name).label("accessory_name"),
+            func.max(category).label("category"),
+            func.sum(PurchaseItem.quantity).label("units"),
+            cast(func.sum(PurchaseItem.quantity * PurchaseItem.price_at_purchase), Numeric(14, 2)).label("revenue"),
+        ).select_from(PurchaseItem)
+            .join(Purchase, Purchase.id == PurchaseItem.purchase_id)
+            .outerjoin(Accessory, Accessory.id == PurchaseItem.accessory_id)
+            .where(*in_batch)
+            .group_by(_day(Purchase.created_at), PurchaseItem.accessory_id))
+
+        processed += db.query(func.count(Purchase.id)).filter(*in_batch).scalar()
+        watermark.last_id = upper
+        db.commit()
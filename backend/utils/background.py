@@ -0,0 +1,84 @@
+# backend/utils/background.py
+import asyncio
+import logging
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from backend.config import (
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS, CART_SWEEP_INTERVAL_SECONDS, DB_THREADPOOL_SIZE, RECOMMENDATIONS_INTERVAL_SECONDS,
+)
+from backend.database.database import SessionLocal
+from backend.utils.analytics import refresh_sales_rollups
+from backend.utils.idempotency import purge_expired_idempotency_keys
+from backend.utils.recommendations import compute_recommendations
+from backend.utils.reservations import release_expired_reservations
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_tasks: list[asyncio.Task] = []
+_db_limiter: Optional[CapacityLimiter] = None
+
+
+async def run_db(func: Callable[..., T], *args: Any) -> T:
+    """Ejecuta `func(*args)` (código síncrono con SQLAlchemy) fuera del event loop.
+
+    Usa su propio límite de hilos (DB_THREADPOOL_SIZE) en vez del threadpool
+    compartido de Starlette: una ráfaga de mensajes de chat no deja sin hilos a
+    los endpoints síncronos, y nunca hay más hilos que conexiones en el pool.
+    """
+    global _db_limiter
+    if _db_limiter is None:
+        _db_limiter = CapacityLimiter(DB_THREADPOOL_SIZE)
+    return await anyio.to_thread.run_sync(func, *args, limiter=_db_limiter)
+
+
+def run_with_session(job: Callable[[Session], Any]) -> Any:
+    """Ejecuta `job(db)` con una sesión propia (los jobs no viven dentro de una petición)."""
+    db = SessionLocal()
+    try:
+        return job(db)
+    finally:
+        db.close()
+
+
+async def _run_periodically(name: str, interval_seconds: float, job: Callable[[Session], Any]) -> None:
+    while True:
+        try:
+            # Los jobs usan la sesión síncrona: se ejecutan en el threadpool para no bloquear el event loop
+            result = await run_in_threadpool(run_with_session, job)
+            logger.debug("Tarea %s completada: %s", name, result)
+        except Exception:
+            logger.exception("Fallo en la tarea periódica %s", name)
+        await asyncio.sleep(interval_seconds)
+
+
+def start_periodic(name: str, interval_seconds: float, job: Callable[[Session], Any]) -> None:
+    _tasks.append(asyncio.create_task(_run_periodically(name, interval_seconds, job), name=name))
+
+
+async def stop_periodic() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+# Tareas periódicas: las arranca backend/worker.py (o la API con RUN_BACKGROUND_JOBS=true).
+# (nombre, intervalo en segundos, job(db))
+PERIODIC_JOBS = [
+    ("purge_idempotency_keys", 3600, purge_expired_idempotency_keys),
+    ("release_expired_reservations", CART_SWEEP_INTERVAL_SECONDS, release_expired_reservations),
+    ("refresh_sales_rollups", ANALYTICS_ROLLUP_INTERVAL_SECONDS, refresh_sales_rollups),
+    ("compute_recommendations", RECOMMENDATIONS_INTERVAL_SECONDS, compute_recommendations),
+]
+
+
+def start_periodic_jobs() -> None:
+    for name, interval, job in PERIODIC_JOBS:
+        start_periodic(name, interval, job)
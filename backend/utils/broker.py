@@ -0,0 +1,275 @@
+# backend/utils/broker.py
+"""Bus de eventos entre procesos de la API (varios workers de uvicorn o varios hosts).
+
+Cada evento es un dict JSON con una clave "type"; quien lo publica no sabe en qué
+proceso están los destinatarios: todos los procesos reciben todos los eventos y
+cada uno entrega a sus propios sockets. Los manejadores se registran por tipo con
+`@subscribe("chat.message")`.
+
+BROKER_URL elige el backend:
+    memory://               un solo proceso (desarrollo y pruebas)
+    postgresql://...        LISTEN/NOTIFY de PostgreSQL (payload máximo ~8000 bytes)
+    redis://host:6379/0     pub/sub de Redis (requiere `pip install redis`)
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+import anyio.from_thread
+from sqlalchemy import event as sa_event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from backend.config import BROKER_URL
+
+logger = logging.getLogger(__name__)
+
+BROKER_CHANNEL = "portfolio_cars_events"
+# NOTIFY rechaza payloads de 8000 bytes o más
+POSTGRES_MAX_PAYLOAD_BYTES = 7999
+
+Handler = Callable[[dict], Awaitable[None]]
+_handlers: dict[str, list[Handler]] = {}
+
+
+def subscribe(event_type: str) -> Callable[[Handler], Handler]:
+    """Registra `handler(event)` para los eventos de `event_type` de cualquier proceso."""
+    def decorator(handler: Handler) -> Handler:
+        _handlers.setdefault(event_type, []).append(handler)
+        return handler
+    return decorator
+
+
+async def dispatch(event: dict) -> None:
+    for handler in _handlers.get(event.get("type"), []):
+        try:
+            await handler(event)
+        except Exception:
+            logger.exception("Fallo al procesar el evento %s", event.get("type"))
+
+
+def encode_event(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+
+
+async def _dispatch_raw(payload: Any) -> None:
+    try:
+        event = json.loads(payload)
+    except (TypeError, ValueError):
+        logger.warning("Evento con formato inválido descartado: %r", payload)
+        return
+    await dispatch(event)
+
+
+class Broker:
+    """Interfaz: publicar un evento y, tras `start()`, recibir los de todos los procesos."""
+
+    # Tamaño máximo del evento codificado (bytes UTF-8); None = sin límite práctico
+    max_payload_bytes: Optional[int] = None
+
+    async def start(self) -> None:
+        pass
+
+    async def publish(self, event: dict) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        pass
+
+
+class MemoryBroker(Broker):
+    """Entrega directa en el mismo proceso: sin backplane, válido con un solo worker."""
+
+    async def publish(self, event: dict) -> None:
+        await dispatch(event)
+
+
+class PostgresBroker(Broker):
+    """LISTEN/NOTIFY sobre una conexión dedicada de psycopg2 vigilada por el event loop."""
+
+    reconnect_delay = 5
+    max_payload_bytes = POSTGRES_MAX_PAYLOAD_BYTES
+
+    def __init__(self, url: str):
+        # make_url acepta la misma forma que DATABASE_URL (postgresql+psycopg2://...)
+        self.url = make_url(url)
+        self.dsn = self.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    def _open_connection(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)  # NOTIFY sin transacción abierta
+        return conn
+
+    def _open_listener(self):
+        conn = self._open_connection()
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {BROKER_CHANNEL}")
+        return conn
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        # Conectar bloquea (DNS, TCP, autenticación): en un hilo, para que un PostgreSQL
+        # lento o caído durante una reconexión no congele todos los sockets del proceso
+        conn = await asyncio.to_thread(self._open_listener)
+        self._listen_conn = conn
+        self._loop.add_reader(conn.fileno(), self._on_readable)
+
+    def _on_readable(self) -> None:
+        conn = self._listen_conn
+        try:
+            conn.poll()
+        except Exception:
+            logger.exception("Conexión LISTEN perdida; reintentando en %ss", self.reconnect_delay)
+            self._close_listener()
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+            return
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            self._loop.create_task(_dispatch_raw(notify.payload))
+
+    async def _reconnect(self) -> None:
+        while self._listen_conn is None:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self.start()
+            except Exception:
+                logger.exception("No se pudo reabrir la conexión LISTEN")
+
+    def _close_listener(self) -> None:
+        if self._listen_conn is not None:
+            self._loop.remove_reader(self._listen_conn.fileno())
+            self._listen_conn.close()
+            self._listen_conn = None
+
+    def _notify(self, payload: str) -> None:
+        with self._publish_lock:
+            for attempt in (1, 2):  # un reintento si la conexión cacheada se cayó
+                try:
+                    if self._publish_conn is None or self._publish_conn.closed:
+                        self._publish_conn = self._open_connection()
+                    with self._publish_conn.cursor() as cur:
+                        cur.execute("SELECT pg_notify(%s, %s)", (BROKER_CHANNEL, payload))
+                    return
+                except Exception:
+                    self._publish_conn = None
+                    if attempt == 2:
+                        raise
+
+    @staticmethod
+    def encode(event: dict) -> str:
+        payload = encode_event(event)
+        if len(payload.encode("utf-8")) > POSTGRES_MAX_PAYLOAD_BYTES:
+            raise ValueError(f"Evento demasiado grande para NOTIFY ({event.get('type')})")
+        return payload
+
+    def shares_database(self, db: Session) -> bool:
+        """True si `db` escribe en la misma base de datos que escucha el broker (NOTIFY es por BD)."""
+        url = db.get_bind().url
+        return url.get_backend_name() == "postgresql" and \
+            (url.host, url.port, url.database) == (self.url.host, self.url.port, self.url.database)
+
+    async def publish(self, event: dict) -> None:
+        await asyncio.to_thread(self._notify, self.encode(event))
+
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        self._close_listener()
+        if self._publish_conn is not None:
+            self._publish_conn.close()
+            self._publish_conn = None
+
+
+class RedisBroker(Broker):
+    """Pub/sub de Redis (o cualquier servidor compatible con su protocolo)."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("BROKER_URL apunta a Redis pero el paquete `redis` no está instalado") from exc
+        self.client = redis.Redis.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(BROKER_CHANNEL)
+        self._listener = asyncio.create_task(self._listen(pubsub), name="broker-listener")
+
+    @staticmethod
+    async def _listen(pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                await _dispatch_raw(message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def publish(self, event: dict) -> None:
+        await self.client.publish(BROKER_CHANNEL, encode_event(event))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        await self.client.aclose()
+
+
+_broker: Optional[Broker] = None
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        if BROKER_URL.startswith(("redis://", "rediss://", "unix://")):
+            _broker = RedisBroker(BROKER_URL)
+        elif BROKER_URL.startswith(("postgresql", "postgres://")):
+            _broker = PostgresBroker(BROKER_URL)
+        else:
+            _broker = MemoryBroker()
+    return _broker
+
+
+async def publish(event: dict) -> None:
+    await get_broker().publish(event)
+
+
+def fits_in_broker(event: dict) -> bool:
+    """False si el backend actual rechazaría el evento por tamaño (NOTIFY)."""
+    limit = get_broker().max_payload_bytes
+    return limit is None or len(encode_event(event).encode("utf-8")) <= limit
+
+
+def publish_from_thread(event: dict) -> None:
+    """`publish` desde un endpoint síncrono (corre en el threadpool de anyio)."""
+    anyio.from_thread.run(publish, event)
+
+
+def publish_on_commit(db: Session, event: dict) -> None:
+    """Publica `event` cuando se confirme la transacción en curso de `db` (endpoint síncrono).
+
+    Con PostgresBroker sobre la misma base de datos, el NOTIFY va dentro de la
+    transacción: PostgreSQL lo entrega con el commit y lo descarta si hay rollback.
+    Con los demás backends se publica justo después del commit; si el broker falla,
+    se registra y la petición sigue, porque la escritura ya está confirmada.
+    """
+    broker = get_broker()
+    if isinstance(broker, PostgresBroker) and broker.shares_database(db):
+        db.execute(select(func.pg_notify(BROKER_CHANNEL, broker.encode(event))))
+        return
+
+    def _publish_after_commit(session: Session) -> None:
+        try:
+            publish_from_thread(event)
+        except Exception:
+            logger.exception("No se pudo publicar el evento %s tras el commit", event.get("type"))
+
+    sa_event.listen(db, "after_commit", _publish_after_commit, once=True)
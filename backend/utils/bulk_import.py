@@ -0,0 +1,82 @@
+# backend/utils/bulk_import.py
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from backend.utils.upsert import upsert_insert
+
+BULK_BATCH_SIZE = 1000
+
+
+def _upsert_statement(db: Session, model, rows: list[dict]):
+    """INSERT multi-fila; si la fila trae `external_id` y ya existe, se actualiza.
+
+    Las filas sin `external_id` nunca colisionan (NULL no viola el índice único)
+    y se insertan como altas normales.
+    """
+    try:
+        stmt = upsert_insert(db, model).values(rows)
+    except NotImplementedError:
+        return insert(model).values(rows)
+    updatable = [key for key in rows[0] if key not in ("id", "created_at", "created_by")]
+    set_ = {key: stmt.excluded[key] for key in updatable}
+    # ON CONFLICT DO UPDATE no ejecuta los `onupdate` de las columnas
+    set_["updated_at"] = datetime.utcnow()
+    return stmt.on_conflict_do_update(index_elements=[model.external_id], set_=set_)
+
+
+def _flush_batch(db: Session, model, batch: list[tuple[int, dict]], errors: list) -> int:
+    # Un INSERT ... ON CONFLICT por lote; si el lote falla se reintenta fila a fila
+    # dentro de SAVEPOINTs para señalar exactamente qué filas rompen la restricción.
+    try:
+        with db.begin_nested():
+            db.execute(_upsert_statement(db, model, [row for _, row in batch]))
+        return len(batch)
+    except SQLAlchemyError:
+        pass
+    upserted = 0
+    for index, row in batch:
+        try:
+            with db.begin_nested():
+                db.execute(_upsert_statement(db, model, [row]))
+            upserted += 1
+        except SQLAlchemyError as exc:
+            errors.append({"index": index, "errors": [str(getattr(exc, "orig", exc)).strip()]})
+    return upserted
+
+
+def bulk_upsert(db: Session, model, schema: Type[BaseModel], rows: Iterable[dict],
+                batch_size: int = BULK_BATCH_SIZE) -> dict:
+    """Valida cada fila con `schema` y hace upsert por lotes de `batch_size`.
+
+    Las filas inválidas se reportan con su índice sin abortar el resto; cada lote
+    se confirma por separado para que un feed de 50k filas no sea una única
+    transacción gigante. `rows` puede ser un generador (p. ej. leyendo un fichero).
+    """
+    received = upserted = 0
+    errors: list[dict] = []
+    iterator = enumerate(rows)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            break
+        received += len(chunk)
+        batch: dict = {}
+        for index, raw in chunk:
+            try:
+                row = schema.model_validate(raw).model_dump()
+            except ValidationError as exc:
+                errors.append({"index": index, "errors": exc.errors(include_url=False, include_context=False)})
+                continue
+            # Un mismo external_id repetido en el lote: gana la última aparición
+            # (ON CONFLICT no puede tocar la misma fila dos veces en una sentencia)
+            batch[row["external_id"] or ("__new__", index)] = (index, row)
+        if batch:
+            upserted += _flush_batch(db, model, list(batch.values()), errors)
+        db.commit()
+    return {"received": received, "upserted": upserted, "errors": errors}
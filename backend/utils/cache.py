@@ -0,0 +1,170 @@
+# backend/utils/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from backend.config import CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_URL
+from backend.utils.http_cache import (
+    is_not_modified, make_validators, not_modified_response, request_scope, validator_headers,
+)
+
+
+class CacheBackend:
+    """Interfaz mínima: bytes por clave + un contador de versión por tabla."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    def get_version(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    def bump_version(self, namespace: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """LRU en proceso con expiración por TTL (por defecto)."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace: str) -> int:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+
+class RedisCache(CacheBackend):
+    """Backend compatible con Redis: comparte entradas y versiones entre workers."""
+
+    prefix = "portfolio_cars:cache:"
+
+    def __init__(self, url: str, ttl: int = CACHE_TTL_SECONDS):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_URL apunta a Redis pero el paquete `redis` no está instalado") from exc
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl or self.ttl)
+
+    def get_version(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}version:{namespace}") or 0)
+
+    def bump_version(self, namespace: str) -> int:
+        return int(self.client.incr(f"{self.prefix}version:{namespace}"))
+
+
+_cache: Optional[CacheBackend] = None
+
+
+def get_cache() -> CacheBackend:
+    global _cache
+    if _cache is None:
+        if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+            _cache = RedisCache(CACHE_URL)
+        else:
+            _cache = MemoryCache()
+    return _cache
+
+
+def bump_version(*namespaces: str) -> None:
+    """Invalida todas las lecturas cacheadas de las tablas indicadas."""
+    cache = get_cache()
+    for namespace in namespaces:
+        cache.bump_version(namespace)
+
+
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def dump_json(response_type: Any, data: Any) -> bytes:
+    """Serializa `data` con el esquema de respuesta, igual que haría FastAPI."""
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def _pack(etag: str, last_modified: Optional[datetime], body: bytes) -> bytes:
+    # Primera línea: validadores HTTP en JSON; el resto: el cuerpo tal cual
+    meta = {"etag": etag, "last_modified": last_modified.isoformat() if last_modified else None}
+    return json.dumps(meta).encode() + b"\n" + body
+
+
+def _unpack(entry: bytes) -> tuple[str, Optional[datetime], bytes]:
+    meta, body = entry.split(b"\n", 1)
+    meta = json.loads(meta)
+    last_modified = datetime.fromisoformat(meta["last_modified"]) if meta["last_modified"] else None
+    return meta["etag"], last_modified, body
+
+
+def cached_json(
+    request: Request,
+    namespace: str,
+    produce: Callable[[], bytes],
+    validators: Callable[[], tuple[Optional[datetime], int]],
+) -> Response:
+    """Read-through con peticiones condicionales.
+
+    La clave incluye la ruta, los parámetros de la query (ordenados) y la versión
+    actual de la tabla, así que una escritura invalida todo sin borrar claves.
+    `validators()` devuelve (max(updated_at), nº de filas) con una consulta ligera;
+    solo se ejecuta en un fallo de caché, y si el cliente ya tiene esa versión
+    se responde 304 antes de cargar filas o serializar.
+    """
+    cache = get_cache()
+    scope = request_scope(request)
+    key = f"{namespace}:v{cache.get_version(namespace)}:{scope}"
+    entry = cache.get(key)
+    if entry is not None:
+        etag, last_modified, body = _unpack(entry)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+    else:
+        etag, last_modified = make_validators(scope, *validators())
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        body = produce()
+        cache.set(key, _pack(etag, last_modified, body))
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, last_modified))
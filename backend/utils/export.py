@@ -0,0 +1,97 @@
+# backend/utils/export.py
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from backend.database.database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def iter_rows(model, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """Recorre la tabla completa por lotes con un cursor del lado del servidor.
+
+    Abre su propia sesión: el generador se consume después de que FastAPI
+    cierre la sesión de `get_db`, y así la memoria queda acotada a un lote.
+    """
+    columns = list(model.__table__.columns)
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*columns).order_by(model.id).execution_options(yield_per=batch_size)
+        )
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _ndjson_chunks(keys: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(keys, row)), default=_json_default, ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode()
+
+
+def _csv_value(value):
+    # Arrays/JSON (image_url, specifications) van como JSON dentro de la celda
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default, ensure_ascii=False)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(keys: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(keys)
+    for batch in batches:
+        writer.writerows([_csv_value(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(model, filename: str, fmt: str = "ndjson", gzip: bool = False) -> StreamingResponse:
+    """StreamingResponse con todas las filas de `model` en NDJSON o CSV."""
+    keys = [column.key for column in model.__table__.columns]
+    formatter = _csv_chunks if fmt == "csv" else _ndjson_chunks
+    chunks = formatter(keys, iter_rows(model))
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,55 @@
+# backend/utils/http_cache.py
+import hashlib
+from urllib.parse import urlencode
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def request_scope(request: Request) -> str:
+    """Ruta + query ordenada: dos URLs distintas nunca comparten ETag."""
+    # urlencode escapa "&" y "=" dentro de los valores: ?a=1%26b%3D2 y ?a=1&b=2 no colisionan
+    params = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{params}"
+
+
+def make_validators(scope: str, last_modified: Optional[datetime], count: int = 1) -> tuple[str, Optional[datetime]]:
+    """ETag débil derivado de (scope, nº de filas, max(updated_at)) y Last-Modified."""
+    stamp = last_modified.isoformat() if last_modified else "-"
+    digest = hashlib.sha1(f"{scope}|{count}|{stamp}".encode()).hexdigest()[:20]
+    if last_modified is not None:
+        # Las columnas updated_at se guardan en UTC sin zona; HTTP trabaja a segundos
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return f'W/"{digest}"', last_modified
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match manda sobre If-Modified-Since (RFC 9110 §13.2.2)
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return etag in candidates or etag.removeprefix("W/") in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict[str, str]:
+    # no-cache: el navegador puede guardar la respuesta pero debe revalidarla siempre
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
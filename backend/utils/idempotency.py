@@ -0,0 +1,81 @@
+# backend/utils/idempotency.py
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional, Union
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.config import IDEMPOTENCY_TTL_HOURS
+from backend.models.idempotency_key import IdempotencyKey
+
+
+def _fingerprint(scope: str, payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(f"{scope}|{body}".encode()).hexdigest()
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def claim_idempotency_key(
+    db: Session, user_id: int, key: Optional[str], scope: str, payload: Any
+) -> Union[None, IdempotencyKey, Response]:
+    """Reserva `key` para esta petición dentro de la transacción actual.
+
+    - Sin cabecera: devuelve None y el endpoint funciona como siempre.
+    - Clave nueva: inserta la fila (en un SAVEPOINT) y la devuelve; el endpoint
+      guarda su respuesta con `store_idempotent_response` antes del commit, de modo
+      que el trabajo y la clave se confirman juntos.
+    - Clave ya usada con el mismo cuerpo: devuelve la respuesta original (O(1),
+      por el índice único) sin repetir el trabajo.
+    Un reintento concurrente queda bloqueado en el INSERT por el índice único
+    hasta que la petición original confirma, y entonces recibe su respuesta.
+    """
+    if not key:
+        return None
+    fingerprint = _fingerprint(scope, payload)
+    query = db.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    existing = query.first()
+    if existing is not None and existing.created_at < datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS):
+        # Clave caducada que el barrido aún no ha borrado: se puede reutilizar
+        db.delete(existing)
+        db.flush()
+        existing = None
+    if existing is None:
+        record = IdempotencyKey(user_id=user_id, key=key, scope=scope, request_hash=fingerprint)
+        try:
+            with db.begin_nested():
+                db.add(record)
+            return record
+        except IntegrityError:
+            existing = query.first()
+    if existing.request_hash != fingerprint:
+        raise HTTPException(status_code=422, detail="La Idempotency-Key ya se usó con una petición distinta")
+    if existing.status_code is None:
+        raise HTTPException(status_code=409, detail="La petición original con esta Idempotency-Key sigue en curso")
+    return _replay(existing)
+
+
+def store_idempotent_response(record: Optional[IdempotencyKey], status_code: int, body: Any) -> None:
+    """Guarda la respuesta serializada en la fila reservada (sin hacer commit)."""
+    if record is None:
+        return
+    record.status_code = status_code
+    record.response_body = json.dumps(body, default=str)
+
+
+def purge_expired_idempotency_keys(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    deleted = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
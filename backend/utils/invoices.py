@@ -0,0 +1,172 @@
+# backend/utils/invoices.py
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from html import escape
+from string import Template
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from backend.config import INVOICE_STORE_DIR
+from backend.database.database import SessionLocal
+from backend.models.purchase import Purchase
+from backend.models.purchase_item import PurchaseItem
+
+_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "invoice.html")
+
+# Plantillas compiladas una sola vez al importar el módulo
+with open(_TEMPLATE_PATH, encoding="utf-8") as _f:
+    INVOICE_TEMPLATE = Template(_f.read())
+ROW_TEMPLATE = Template(
+    "            <tr>\n"
+    "                <td>$name</td>\n"
+    "                <td>$quantity</td>\n"
+    "                <td>$$$price</td>\n"
+    "                <td>$$$total</td>\n"
+    "            </tr>"
+)
+
+
+def render_invoice(invoice_number: str, created_at: datetime, username: str, email: str,
+                   lines: Iterable[tuple[str, int, float]]) -> bytes:
+    """HTML de la factura a partir de (nombre, cantidad, precio unitario) por línea."""
+    rows = []
+    total = 0.0
+    for name, quantity, price in lines:
+        line_total = quantity * price
+        total += line_total
+        rows.append(ROW_TEMPLATE.substitute(
+            name=escape(name), quantity=quantity, price=f"{price:,.2f}", total=f"{line_total:,.2f}"
+        ))
+    return INVOICE_TEMPLATE.substitute(
+        invoice_number=escape(invoice_number),
+        date=created_at.strftime('%d/%m/%Y %H:%M'),
+        username=escape(username),
+        email=escape(email),
+        rows="\n".join(rows),
+        total=f"{total:,.2f}",
+    ).encode("utf-8")
+
+
+# Todo con selectinload: una consulta por relación y lote, compatible con yield_per
+INVOICE_LOAD_OPTIONS = (
+    selectinload(Purchase.items).selectinload(PurchaseItem.accessory),
+    selectinload(Purchase.user),
+)
+INVOICE_EXPORT_BATCH_SIZE = 500
+
+
+def invoice_path(invoice_hash: str) -> str:
+    # Dos niveles (ab/abcdef...) para no acumular miles de ficheros en un solo directorio
+    return os.path.join(INVOICE_STORE_DIR, invoice_hash[:2], f"{invoice_hash}.html.gz")
+
+
+def store_invoice(content: bytes) -> str:
+    """Guarda `content` comprimido bajo su sha256 y devuelve el hash.
+
+    El nombre depende solo del contenido: volver a guardar la misma factura no
+    escribe nada, y la escritura es atómica (fichero temporal + rename).
+    """
+    invoice_hash = hashlib.sha256(content).hexdigest()
+    path = invoice_path(invoice_hash)
+    if os.path.exists(path):
+        return invoice_hash
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(gzip.compress(content, mtime=0))  # mtime=0: mismo contenido, mismos bytes
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return invoice_hash
+
+
+def ensure_invoice(db: Session, purchase: Purchase) -> str:
+    """Hash de la factura de `purchase`, renderizándola si aún no está en el almacén.
+
+    Las compras anteriores al almacén (o un almacén borrado) se regeneran aquí en
+    la primera descarga, cargando líneas y accesorios en consultas fijas en vez de N+1.
+    """
+    if purchase.invoice_hash and os.path.exists(invoice_path(purchase.invoice_hash)):
+        return purchase.invoice_hash
+    purchase = db.query(Purchase)\
+        .options(*INVOICE_LOAD_OPTIONS)\
+        .filter(Purchase.id == purchase.id)\
+        .one()
+    purchase.invoice_hash = store_invoice(_render_purchase(purchase))
+    db.commit()
+    return purchase.invoice_hash
+
+
+def _render_purchase(purchase: Purchase) -> bytes:
+    return render_invoice(
+        purchase.invoice_number, purchase.created_at, purchase.user.username, purchase.user.email,
+        [(item.accessory.name, item.quantity, item.price_at_purchase) for item in purchase.items],
+    )
+
+
+def _read_invoice(purchase: Purchase) -> bytes:
+    if purchase.invoice_hash:
+        try:
+            with open(invoice_path(purchase.invoice_hash), "rb") as f:
+                return gzip.decompress(f.read())
+        except FileNotFoundError:
+            pass
+    return _render_purchase(purchase)
+
+
+class _ZipStream(io.RawIOBase):
+    """Destino no 'seekable' de ZipFile: acumula lo escrito hasta que se vacía con `drain()`."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_invoices_zip(start: datetime, end: datetime, batch_size: int = INVOICE_EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """ZIP con las facturas de las compras en [start, end), generado entrada a entrada.
+
+    Igual que la exportación del catálogo, abre su propia sesión y recorre las
+    compras con un cursor del servidor (yield_per): `selectinload` carga líneas
+    y accesorios por lote, así que la memoria no crece con el número de facturas.
+    Las facturas ya guardadas se leen del almacén; el resto se renderiza al vuelo
+    sin escribir nada (la exportación es de solo lectura).
+    """
+    db = SessionLocal()
+    stream = _ZipStream()
+    try:
+        purchases = db.scalars(
+            select(Purchase)
+            .options(*INVOICE_LOAD_OPTIONS)
+            .where(Purchase.created_at >= start, Purchase.created_at < end)
+            .order_by(Purchase.created_at, Purchase.id)
+            .execution_options(yield_per=batch_size)
+        )
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for purchase in purchases:
+                info = zipfile.ZipInfo(f"{purchase.invoice_number}.html", purchase.created_at.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, _read_invoice(purchase))
+                yield stream.drain()
+        yield stream.drain()  # directorio central del ZIP
+    finally:
+        db.close()
@@ -0,0 +1,262 @@
+# backend/utils/message_writer.py
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from backend.config import (
+    MESSAGE_DEAD_LETTER_PATH, MESSAGE_FLUSH_BATCH_SIZE, MESSAGE_FLUSH_INTERVAL_MS, MESSAGE_SPOOL_PATH,
+)
+from backend.database.database import SessionLocal
+from backend.models.message import Message
+from backend.utils.background import run_db
+from backend.utils.upsert import upsert_insert
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_file(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Fallo de la BD (caída, conexión perdida, bloqueo), no de los datos de la fila."""
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(exc, (OperationalError, InterfaceError))
+
+
+class MessageWriter:
+    """Persistencia diferida (write-behind) de los mensajes del chat.
+
+    El mensaje llega con id (bloque de la secuencia) y created_at ya asignados, se
+    entrega en el acto y queda en memoria hasta el siguiente volcado: cada
+    `flush_interval` segundos o en cuanto hay `batch_size` pendientes, un único
+    INSERT multi-fila por lote. El INSERT ignora ids ya existentes, así que
+    reintentar un lote es inocuo.
+
+    Si la BD falla, el lote se añade (con fsync) al fichero de respaldo y se
+    reinserta tras el siguiente volcado correcto o al arrancar. Si lo que falla es
+    el lote y no la BD (una fila que viola una FK, por ejemplo), se reintenta fila
+    a fila y las que siguen fallando van al fichero de descartes: una fila mala no
+    arrastra al resto ni bloquea el respaldo. Al apagar se vuelca todo lo
+    pendiente; solo una caída abrupta del proceso puede perder los mensajes de la
+    última ventana de volcado.
+    """
+
+    def __init__(self, flush_interval: float = MESSAGE_FLUSH_INTERVAL_MS / 1000,
+                 batch_size: int = MESSAGE_FLUSH_BATCH_SIZE, spool_path: str = MESSAGE_SPOOL_PATH,
+                 dead_letter_path: str = MESSAGE_DEAD_LETTER_PATH):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.spool_path = spool_path
+        self.dead_letter_path = dead_letter_path
+        self._pending: list[dict] = []
+        self._inflight: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._spool_lock = threading.Lock()
+
+    # --- ciclo de vida ------------------------------------------------------
+
+    async def start(self) -> None:
+        self._ensure_task()
+        try:
+            await run_db(self._replay_spool)
+        except Exception:
+            # La API arranca igualmente; el respaldo se reintenta tras el próximo volcado
+            logger.exception("No se pudo reinsertar el fichero de respaldo de mensajes")
+
+    def _ensure_task(self) -> None:
+        if self._task is None or self._task.done():
+            self._batch_ready = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run(), name="message-writer")
+
+    async def stop(self) -> None:
+        """Vuelca todo lo pendiente (apagado ordenado)."""
+        if self._task is None:
+            return
+        async with self._flush_lock:  # no cancelar un volcado a medias
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._pending:
+            await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            if self._pending:
+                try:
+                    await self.flush()
+                except Exception:
+                    logger.exception("Fallo en el volcado de mensajes")
+
+    # --- escritura ----------------------------------------------------------
+
+    def enqueue(self, row: dict) -> None:
+        """Encola una fila de `messages` (sin esperar a la BD); se llama desde el event loop."""
+        self._ensure_task()
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            rows, self._pending = self._pending, []
+            self._inflight = rows
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    batch = rows[start:start + self.batch_size]
+                    try:
+                        rejected = await run_db(self._insert_or_isolate, batch)
+                        if rejected:
+                            await run_db(self._dead_letter, rejected)
+                    except Exception:
+                        remaining = rows[start:]
+                        logger.exception("No se pudieron guardar %s mensajes; van al fichero de respaldo", len(remaining))
+                        try:
+                            await run_db(self._spool, remaining)
+                        except Exception:
+                            # Ni BD ni disco: siguen en memoria para el próximo volcado
+                            logger.exception("Fallo al escribir el respaldo de mensajes")
+                            self._pending[:0] = remaining
+                        return
+                await run_db(self._replay_spool)
+            finally:
+                self._inflight = []
+
+    def pending_for(self, consultation_id: int) -> list[dict]:
+        """Filas de la consulta aún sin volcar en este proceso (para el historial)."""
+        return [row for row in self._inflight + self._pending if row["consultation_id"] == consultation_id]
+
+    @staticmethod
+    def _insert(rows: list[dict]) -> None:
+        with SessionLocal() as db:
+            stmt = upsert_insert(db, Message).on_conflict_do_nothing(index_elements=["id"])
+            db.execute(stmt, rows)
+            db.commit()
+
+    def _insert_or_isolate(self, rows: list[dict]) -> list[dict]:
+        """Inserta el lote; si lo rechazan sus datos, fila a fila. Devuelve las filas rechazadas.
+
+        Los fallos transitorios de la BD se propagan (el lote entero va al respaldo):
+        las filas ya insertadas se ignoran al reintentar gracias al ON CONFLICT.
+        """
+        try:
+            self._insert(rows)
+            return []
+        except Exception as exc:
+            if _is_transient(exc):
+                raise
+        rejected = []
+        for row in rows:
+            try:
+                self._insert([row])
+            except Exception as exc:
+                if _is_transient(exc):
+                    raise
+                logger.error("Mensaje %s rechazado por la BD, va a descartes: %r", row.get("id"), exc)
+                rejected.append(row)
+        return rejected
+
+    # --- ficheros de respaldo y descartes -----------------------------------
+    # Todos los workers de uvicorn comparten las rutas: cada acceso se hace con un
+    # bloqueo del sistema operativo sobre `<spool_path>.lock`, además del de hilos.
+
+    @contextmanager
+    def _locked(self):
+        with self._spool_lock:
+            os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+            with open(self.spool_path + ".lock", "a+b") as lock_file:
+                _lock_file(lock_file)
+                try:
+                    yield
+                finally:
+                    _unlock_file(lock_file)
+
+    def _spool(self, rows: list[dict]) -> None:
+        with self._locked():
+            self._append(self.spool_path, rows)
+
+    def _dead_letter(self, rows: list[dict]) -> None:
+        with self._locked():
+            self._append(self.dead_letter_path, rows)
+
+    @staticmethod
+    def _append(path: str, rows: list[dict]) -> None:
+        """Añade las filas como líneas JSON, con fsync; el llamador tiene el bloqueo."""
+        lines = "".join(
+            json.dumps({**row, "created_at": row["created_at"].isoformat()}, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_spool(self) -> int:
+        """Reinserta lo respaldado (por cualquier worker) y borra el fichero.
+
+        El bloqueo se mantiene durante toda la reinserción: otro worker que quiera
+        respaldar o reinsertar espera, y nunca se procesa el mismo fichero dos veces
+        ni se borra una línea añadida a mitad de la lectura.
+        """
+        if not os.path.exists(self.spool_path):
+            return 0
+        with self._locked():
+            if not os.path.exists(self.spool_path):
+                return 0  # otro worker lo reinsertó mientras esperábamos el bloqueo
+            rows = []
+            with open(self.spool_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning("Línea del respaldo de mensajes ilegible descartada: %r", line)
+                        continue
+                    rows.append(row)
+            # Las filas malas van a descartes; solo un fallo de la BD deja el fichero para otro intento
+            rejected = []
+            for start in range(0, len(rows), self.batch_size):
+                rejected += self._insert_or_isolate(rows[start:start + self.batch_size])
+            if rejected:
+                self._append(self.dead_letter_path, rejected)
+            os.unlink(self.spool_path)
+        logger.info("Reinsertados %s mensajes del fichero de respaldo", len(rows) - len(rejected))
+        return len(rows)
+
+
+message_writer = MessageWriter()
@@ -0,0 +1,69 @@
+# backend/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Codifica (columna de orden, valor, id) en un cursor opaco y URL-safe."""
+    payload = json.dumps({"s": sort, "v": _to_json_value(value), "i": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, parse: Callable[[Any], Any]) -> tuple[Any, int]:
+    """Decodifica un cursor generado por encode_cursor para la misma columna de orden."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort:
+            raise ValueError("sort mismatch")
+        return parse(payload["v"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError, ArithmeticError):
+        # ArithmeticError: Decimal("abc") lanza decimal.InvalidOperation, que no es ValueError
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def keyset_condition(column, id_column, value: Any, last_id: int, descending: bool = False):
+    """Condición `(column, id) > (value, last_id)` (o `<` si el orden es descendente).
+
+    Se expande con OR/AND en lugar de una comparación de tuplas para que funcione
+    igual en PostgreSQL y SQLite y siga pudiendo usar el índice compuesto.
+    """
+    if descending:
+        return or_(column < value, and_(column == value, id_column < last_id))
+    return or_(column > value, and_(column == value, id_column > last_id))
+
+
+def keyset_page(query, column, id_column, sort: str, limit: int, after: Optional[str],
+                parse: Callable[[Any], Any], descending: bool = False):
+    """Aplica paginación por cursor a `query` y devuelve (filas, next_cursor).
+
+    Se pide una fila de más para saber si existe página siguiente sin un COUNT.
+    """
+    if after:
+        value, last_id = decode_cursor(after, sort, parse)
+        query = query.filter(keyset_condition(column, id_column, value, last_id, descending))
+    if descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), getattr(last, id_column.key))
+    return rows, next_cursor
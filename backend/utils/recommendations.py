@@ -0,0 +1,156 @@
+# backend/utils/recommendations.py
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from backend.config import RECOMMENDATIONS_INTERVAL_SECONDS, RECOMMENDATIONS_RELOAD_SECONDS, RECOMMENDATIONS_TOP_K
+from backend.models.accessory_recommendation import AccessoryRecommendation
+from backend.models.purchase_item import PurchaseItem
+from backend.models.sales_rollup import RollupWatermark
+from backend.utils.cache import bump_version, get_cache
+
+RECOMMENDATIONS_NAMESPACE = "recommendations"
+RECOMMENDATIONS_WATERMARK = "recommendations"
+PAIRS_BATCH_SIZE = 50000
+
+
+def load_purchase_pairs(db: Session, batch_size: int = PAIRS_BATCH_SIZE) -> np.ndarray:
+    """Todas las parejas (purchase_id, accessory_id) como array (n, 2), leídas por lotes."""
+    result = db.execute(
+        select(PurchaseItem.purchase_id, PurchaseItem.accessory_id).execution_options(yield_per=batch_size)
+    )
+    chunks = [np.asarray(partition, dtype=np.int64) for partition in result.partitions()]
+    if not chunks:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def top_k_cooccurrence(pairs: np.ndarray, k: int = RECOMMENDATIONS_TOP_K):
+    """Top-K vecinos de cada accesorio por co-ocurrencia en la misma compra.
+
+    Matriz dispersa compras × accesorios (binaria) X; C = Xᵀ·X cuenta en cuántas
+    compras aparece cada pareja y su diagonal, cuántas veces se compró cada uno.
+    La puntuación es la similitud coseno C[i, j] / √(C[i, i]·C[j, j]), que no premia
+    solo a los productos más vendidos. El top-K sale de una ordenación global
+    (lexsort) y del rango dentro de cada fila: sin bucles de Python.
+
+    Devuelve arrays paralelos (accessory_id, rank, related_id, score, together).
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if len(pairs) == 0:
+        return empty, empty, empty, np.empty(0), empty
+    items, item_idx = np.unique(pairs[:, 1], return_inverse=True)
+    _, basket_idx = np.unique(pairs[:, 0], return_inverse=True)
+    baskets = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (basket_idx, item_idx)),
+        shape=(basket_idx.max() + 1, len(items)),
+    )
+    baskets.sum_duplicates()
+    baskets.data[:] = 1  # dos líneas del mismo accesorio en una compra cuentan una vez
+    counts = (baskets.T @ baskets).tocoo()
+    frequency = counts.diagonal()
+
+    off_diagonal = counts.row != counts.col
+    row, col, together = counts.row[off_diagonal], counts.col[off_diagonal], counts.data[off_diagonal]
+    score = together / np.sqrt(frequency[row].astype(np.float64) * frequency[col])
+
+    # Por fila, de mayor a menor puntuación (desempate: más compras juntas, luego id)
+    order = np.lexsort((col, -together, -score, row))
+    row, col, together, score = row[order], col[order], together[order], score[order]
+    rank = np.arange(len(row)) - np.searchsorted(row, row, side="left")
+    keep = rank < k
+    return items[row[keep]], rank[keep], items[col[keep]], score[keep], together[keep]
+
+
+def compute_recommendations(db: Session, k: int = RECOMMENDATIONS_TOP_K,
+                            min_age_seconds: float = RECOMMENDATIONS_INTERVAL_SECONDS / 2) -> int:
+    """Recalcula `accessory_recommendations` desde cero y avisa a los índices en memoria.
+
+    El job puede estar programado en varios procesos a la vez (cada worker de la
+    API con RUN_BACKGROUND_JOBS=true y `backend/worker.py`), pero solo uno
+    recalcula por intervalo: la marca "recommendations" se lee con FOR UPDATE y, si
+    otro proceso la actualizó hace menos de `min_age_seconds`, no se hace nada.
+    Su updated_at es también la versión que vigilan los demás procesos.
+    """
+    watermark = db.query(RollupWatermark)\
+        .filter(RollupWatermark.name == RECOMMENDATIONS_WATERMARK)\
+        .with_for_update()\
+        .first()
+    if watermark is None:
+        watermark = RollupWatermark(name=RECOMMENDATIONS_WATERMARK, last_id=0)
+        db.add(watermark)
+        db.flush()
+    elif watermark.updated_at is not None and \
+            watermark.updated_at > datetime.utcnow() - timedelta(seconds=min_age_seconds):
+        db.rollback()
+        return 0
+
+    pairs = load_purchase_pairs(db)
+    accessory_ids, ranks, related_ids, scores, together = top_k_cooccurrence(pairs, k)
+    # Sustitución completa en una transacción: los lectores ven la tabla vieja hasta el commit
+    db.query(AccessoryRecommendation).delete(synchronize_session=False)
+    if len(accessory_ids):
+        db.execute(insert(AccessoryRecommendation), [
+            {"accessory_id": a, "rank": r, "related_id": b, "score": s, "together": t}
+            for a, r, b, s, t in zip(
+                accessory_ids.tolist(), ranks.tolist(), related_ids.tolist(), scores.tolist(), together.tolist()
+            )
+        ])
+    watermark.last_id = int(pairs[:, 0].max()) if len(pairs) else 0  # última compra incluida
+    watermark.updated_at = datetime.utcnow()
+    db.commit()
+    bump_version(RECOMMENDATIONS_NAMESPACE)
+    return len(accessory_ids)
+
+
+class _RelatedIndex:
+    """accessory_id -> ids relacionados (por rango), cargado entero en memoria.
+
+    Se recarga de la tabla cuando cambia la versión del namespace "recommendations"
+    de la caché (inmediato en el proceso que recalculó, o en todos con
+    CACHE_URL=redis://) o cuando, al comprobarlo cada `check_interval` segundos,
+    la marca "recommendations" de la BD indica que otro proceso recalculó.
+    """
+
+    def __init__(self, check_interval: float = RECOMMENDATIONS_RELOAD_SECONDS):
+        self._lock = threading.Lock()
+        self.check_interval = check_interval
+        self._version: Optional[int] = None
+        self._computed_at: Optional[datetime] = None
+        self._checked_at = float("-inf")
+        self._related: dict[int, list[int]] = {}
+
+    def _stale(self, version: int) -> bool:
+        return version != self._version or time.monotonic() - self._checked_at > self.check_interval
+
+    def get(self, db: Session, accessory_id: int) -> list[int]:
+        version = get_cache().get_version(RECOMMENDATIONS_NAMESPACE)
+        if self._stale(version):
+            with self._lock:
+                if self._stale(version):
+                    computed_at = db.query(RollupWatermark.updated_at)\
+                        .filter(RollupWatermark.name == RECOMMENDATIONS_WATERMARK)\
+                        .scalar()
+                    if version != self._version or computed_at != self._computed_at:
+                        self._related = self._load(db)
+                    self._version, self._computed_at = version, computed_at
+                    self._checked_at = time.monotonic()
+        return self._related.get(accessory_id, [])
+
+    @staticmethod
+    def _load(db: Session) -> dict[int, list[int]]:
+        related: dict[int, list[int]] = {}
+        rows = db.query(AccessoryRecommendation.accessory_id, AccessoryRecommendation.related_id)\
+            .order_by(AccessoryRecommendation.accessory_id, AccessoryRecommendation.rank)
+        for accessory_id, related_id in rows:
+            related.setdefault(accessory_id, []).append(related_id)
+        return related
+
+
+related_index = _RelatedIndex()
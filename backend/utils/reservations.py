@@ -0,0 +1,76 @@
+# backend/utils/reservations.py
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from backend.config import CART_RESERVATION_MINUTES
+from backend.models.accessory import Accessory
+from backend.models.cart_item import CartItem
+
+RELEASE_BATCH_SIZE = 5000
+
+
+def reservation_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(minutes=CART_RESERVATION_MINUTES)
+
+
+def reserved_quantities(exclude_user_id: Optional[int] = None):
+    """Subconsulta (accessory_id, reserved) con las reservas aún vigentes.
+
+    `exclude_user_id` descuenta las del propio usuario: al volver a añadir o al
+    pagar, lo que ya tiene apartado cuenta como suyo, no como ocupado.
+    """
+    query = select(CartItem.accessory_id, func.sum(CartItem.quantity).label("reserved"))\
+        .where(CartItem.reserved_until > datetime.utcnow())
+    if exclude_user_id is not None:
+        query = query.where(CartItem.user_id != exclude_user_id)
+    return query.group_by(CartItem.accessory_id).subquery("reserved_quantities")
+
+
+def availability_query(db: Session, accessory_ids: Optional[Iterable[int]] = None,
+                       exclude_user_id: Optional[int] = None):
+    """available = stock − reservas activas, en una sola consulta (LEFT JOIN al agregado)."""
+    reserved = reserved_quantities(exclude_user_id)
+    reserved_col = func.coalesce(reserved.c.reserved, 0)
+    query = db.query(
+        Accessory.id.label("accessory_id"),
+        Accessory.stock,
+        reserved_col.label("reserved"),
+        (Accessory.stock - reserved_col).label("available"),
+    ).outerjoin(reserved, reserved.c.accessory_id == Accessory.id)
+    if accessory_ids is not None:
+        query = query.filter(Accessory.id.in_(list(accessory_ids)))
+    return query.order_by(Accessory.id)
+
+
+def reserved_by_others(db: Session, accessory_ids: Iterable[int], user_id: int) -> dict[int, int]:
+    reserved = reserved_quantities(exclude_user_id=user_id)
+    rows = db.execute(select(reserved).where(reserved.c.accessory_id.in_(list(accessory_ids)))).all()
+    return {row.accessory_id: row.reserved for row in rows}
+
+
+def release_expired_reservations(db: Session, batch_size: int = RELEASE_BATCH_SIZE) -> int:
+    """Libera las reservas caducadas con UPDATEs por conjuntos de `batch_size` filas.
+
+    El ítem sigue en el carrito (sin `reserved_until`): el stock deja de estar
+    apartado y, si el usuario vuelve, se reserva de nuevo al añadir o al pagar.
+    Cada lote se confirma por separado para no mantener bloqueos largos.
+    """
+    released = 0
+    while True:
+        expired_ids = select(CartItem.id)\
+            .where(CartItem.reserved_until <= datetime.utcnow())\
+            .limit(batch_size)\
+            .scalar_subquery()
+        result = db.execute(
+            update(CartItem)
+            .where(CartItem.id.in_(expired_ids))
+            .values(reserved_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        released += result.rowcount
+        if result.rowcount < batch_size:
+            return released
@@ -0,0 +1,52 @@
+# backend/utils/search.py
+import re
+
+from sqlalchemy import case, func, literal_column, or_
+
+from backend.models.car import Car
+
+# ⚠️ Debe coincidir EXACTAMENTE con la expresión del índice GIN `ix_cars_search`
+# (migración 8d51e0b3a6f4); si cambia, PostgreSQL deja de usar el índice.
+CAR_SEARCH_VECTOR_SQL = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(brand, '') || ' ' || coalesce(model, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(engine, ''))"
+)
+
+# Columnas usadas por la búsqueda de respaldo (SQLite) y su peso en el ranking
+CAR_SEARCH_FALLBACK_COLUMNS = (
+    (Car.brand, 4),
+    (Car.model, 4),
+    (Car.engine, 2),
+    (Car.description, 1),
+)
+
+
+def search_terms(q: str) -> list[str]:
+    """Normaliza el texto de búsqueda a una lista de términos alfanuméricos."""
+    return [term.lower() for term in re.findall(r"\w+", q or "")][:10]
+
+
+def _tsquery(terms: list[str]):
+    # Búsqueda por prefijo ("ferr" encuentra "Ferrari"); todos los términos son obligatorios
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{t}:*" for t in terms))
+
+
+def car_search_conditions(dialect_name: str, terms: list[str]) -> list:
+    if dialect_name == "postgresql":
+        return [literal_column(CAR_SEARCH_VECTOR_SQL).op("@@")(_tsquery(terms))]
+    # Respaldo para SQLite/tests: cada término debe aparecer en alguna columna
+    return [
+        or_(*(column.ilike(f"%{term}%") for column, _ in CAR_SEARCH_FALLBACK_COLUMNS))
+        for term in terms
+    ]
+
+
+def car_search_rank(dialect_name: str, terms: list[str]):
+    if dialect_name == "postgresql":
+        return func.ts_rank(literal_column(CAR_SEARCH_VECTOR_SQL), _tsquery(terms))
+    return sum(
+        case((column.ilike(f"%{term}%"), weight), else_=0)
+        for term in terms
+        for column, weight in CAR_SEARCH_FALLBACK_COLUMNS
+    )
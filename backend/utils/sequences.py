@@ -0,0 +1,77 @@
+# backend/utils/sequences.py
+import threading
+from typing import Optional
+
+from sqlalchemy import Sequence, func, select, update
+from sqlalchemy.orm import Session
+
+from backend.models.sequence_counter import SequenceCounter
+from backend.utils.upsert import upsert_insert
+
+
+class SequenceBlockAllocator:
+    """Reparte valores de una secuencia de PostgreSQL por bloques (hi/lo) en memoria.
+
+    La secuencia se crea con INCREMENT BY `block_size`: cada `nextval` reserva el
+    bloque [hi, hi + block_size) para este proceso y los siguientes valores salen
+    de memoria sin ir a la base de datos. `nextval` nunca repite ni bloquea, así
+    que varios procesos no colisionan; a cambio, un reinicio deja huecos.
+
+    En bases sin secuencias (SQLite, desarrollo y pruebas) cada valor sale de la
+    tabla `sequence_counters`, sin bloques: el contador avanza dentro de la
+    transacción de `db`, así que el llamador debe confirmarla antes de usar el
+    valor fuera de ella. Si se deshace, el valor se vuelve a repartir. `column`
+    (p. ej. Message.id) hace que el contador empiece tras el mayor valor existente.
+    """
+
+    def __init__(self, sequence: Sequence, column=None):
+        self.sequence = sequence
+        self.column = column
+        self.block_size = sequence.increment or 1
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+
+    def next_value(self, db: Session) -> int:
+        if db.get_bind().dialect.name != "postgresql":
+            return self._next_from_counter(db)
+        with self._lock:
+            if self._next >= self._limit:
+                hi = db.execute(select(self.sequence.next_value())).scalar_one()
+                self._next, self._limit = hi, hi + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    def try_next_value(self) -> Optional[int]:
+        """Siguiente valor del bloque en memoria, o None si hace falta pedir otro a la BD."""
+        with self._lock:
+            if self._next >= self._limit:
+                return None
+            value = self._next
+            self._next += 1
+            return value
+
+    def _next_from_counter(self, db: Session) -> int:
+        counter = SequenceCounter.__table__
+        for _ in range(2):  # la primera vez el contador aún no existe
+            value = db.execute(
+                update(counter)
+                .where(counter.c.name == self.sequence.name)
+                .values(value=counter.c.value + 1)
+                .returning(counter.c.value - 1)
+            ).scalar()
+            if value is not None:
+                return value
+            db.execute(
+                upsert_insert(db, SequenceCounter)
+                .values(name=self.sequence.name, value=self._initial_value(db))
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+        raise RuntimeError(f"No se pudo inicializar el contador {self.sequence.name}")
+
+    def _initial_value(self, db: Session) -> int:
+        start = self.sequence.start or 1
+        if self.column is None:
+            return start
+        return max(start, (db.scalar(select(func.max(self.column))) or 0) + 1)
@@ -0,0 +1,160 @@
+# backend/utils/similarity.py
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.config import SIMILAR_CARS_MAX_AGE_SECONDS
+from backend.models.car import Car
+from backend.utils.cache import get_cache
+
+# Especificaciones numéricas comparadas y su peso en la distancia (el precio y la
+# potencia definen más "un coche parecido" que el kilometraje)
+SIMILARITY_FEATURES = ("year", "price", "horsepower", "top_speed", "mileage")
+SIMILARITY_WEIGHTS = np.array([1.0, 2.0, 1.5, 1.0, 0.5])
+_FEATURE_COLUMNS = [getattr(Car, name) for name in SIMILARITY_FEATURES]
+
+
+def similarity_features(car) -> np.ndarray:
+    return np.array([getattr(car, name) for name in SIMILARITY_FEATURES], dtype=np.float64)
+
+
+class CarFeatureIndex:
+    """Matriz en memoria (n_coches × specs) normalizada, para "coches parecidos".
+
+    Cada columna se normaliza con z-score (media y desviación de la última
+    reconstrucción completa); un valor ausente queda en 0, la media, y no
+    penaliza. Las escrituras de este proceso se aplican fila a fila (`on_write`)
+    sin reconstruir. La reconstrucción completa ocurre al arrancar, cuando la
+    versión "cars" de la caché cambió por otra vía (otro worker con CACHE_URL
+    compartido, importación masiva) o cuando el índice supera `max_age` segundos:
+    con la caché en memoria cada worker tiene su propia versión y solo la
+    antigüedad le hace ver las escrituras de los demás.
+    Solo se indexan coches publicados y no borrados.
+    """
+
+    def __init__(self, max_age: float = SIMILAR_CARS_MAX_AGE_SECONDS):
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        self.version: Optional[int] = None
+        self._built_at = float("-inf")
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, len(SIMILARITY_FEATURES)))
+        self._size = 0
+        self._positions: dict[int, int] = {}
+        self._mean = np.zeros(len(SIMILARITY_FEATURES))
+        self._std = np.ones(len(SIMILARITY_FEATURES))
+
+    def __len__(self) -> int:
+        return self._size
+
+    # --- construcción -------------------------------------------------------
+
+    def load(self, ids: np.ndarray, raw: np.ndarray) -> None:
+        """Reconstruye el índice desde arrays (ids, valores crudos con NaN si faltan)."""
+        with self._lock:
+            self._load(np.asarray(ids, dtype=np.int64), np.asarray(raw, dtype=np.float64))
+
+    def _load(self, ids: np.ndarray, raw: np.ndarray) -> None:
+        if len(ids):
+            with np.errstate(all="ignore"):  # columnas enteras a NULL dan NaN sin aviso
+                mean = np.nanmean(raw, axis=0)
+                std = np.nanstd(raw, axis=0)
+            self._mean = np.nan_to_num(mean)
+            self._std = np.where(np.isnan(std) | (std == 0), 1.0, std)
+        self._ids = ids.copy()
+        self._matrix = self._normalize(raw)
+        self._size = len(ids)
+        self._positions = {int(car_id): row for row, car_id in enumerate(ids.tolist())}
+        self._built_at = time.monotonic()
+
+    def _rebuild(self, db: Session) -> None:
+        rows = db.execute(
+            select(Car.id, *_FEATURE_COLUMNS).where(Car.is_published.is_(True), Car.deleted_at.is_(None))
+        ).all()
+        data = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(SIMILARITY_FEATURES))
+        self._load(np.array([row[0] for row in rows], dtype=np.int64), data)
+
+    def _normalize(self, raw: np.ndarray) -> np.ndarray:
+        return np.nan_to_num((raw - self._mean) / self._std)
+
+    # --- escrituras incrementales ------------------------------------------
+
+    def on_write(self, version: int, car=None, deleted_id: Optional[int] = None) -> None:
+        """Aplica una escritura ya confirmada; `version` es la versión "cars" tras ella.
+
+        Si el índice estaba al día justo antes (version - 1), basta con tocar una
+        fila; si no, se deja desfasado y la próxima consulta lo reconstruye.
+        """
+        with self._lock:
+            if self.version is None or self.version != version - 1:
+                return
+            if car is not None and car.is_published and car.deleted_at is None:
+                self._upsert(car.id, similarity_features(car))
+            else:
+                self._remove(car.id if car is not None else deleted_id)
+            self.version = version
+
+    def _upsert(self, car_id: int, raw: np.ndarray) -> None:
+        row = self._positions.get(car_id)
+        if row is None:
+            if self._size == len(self._ids):  # crecer por duplicación: inserciones O(1) amortizadas
+                capacity = max(16, 2 * self._size)
+                self._ids = np.resize(self._ids, capacity)
+                self._matrix = np.resize(self._matrix, (capacity, len(SIMILARITY_FEATURES)))
+            row = self._size
+            self._size += 1
+            self._positions[car_id] = row
+            self._ids[row] = car_id
+        self._matrix[row] = self._normalize(raw)
+
+    def _remove(self, car_id: Optional[int]) -> None:
+        row = self._positions.pop(car_id, None)
+        if row is None:
+            return
+        # La última fila ocupa el hueco: borrado O(1) sin desplazar la matriz
+        last = self._size - 1
+        if row != last:
+            self._ids[row] = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._positions[int(self._ids[row])] = row
+        self._size = last
+
+    # --- consulta -----------------------------------------------------------
+
+    def nearest(self, db: Session, car_id: int, k: int, raw: Optional[np.ndarray] = None) -> list[int]:
+        """Ids de los `k` coches más cercanos a `car_id`, del más al menos parecido.
+
+        Una sola pasada vectorizada: distancia euclídea ponderada al cuadrado contra
+        toda la matriz y `argpartition` para el top-k (O(n), sin ordenar todo).
+        `raw` permite consultar por un coche que no está indexado (p. ej. sin publicar).
+        """
+        version = get_cache().get_version("cars")
+        with self._lock:
+            if version != self.version or time.monotonic() - self._built_at > self.max_age:
+                self._rebuild(db)
+                self.version = version
+            n = self._size
+            row = self._positions.get(car_id)
+            if row is not None:
+                target = self._matrix[row]
+            elif raw is not None:
+                target = self._normalize(raw)
+            else:
+                return []
+            diff = self._matrix[:n] - target
+            distances = (diff * diff) @ SIMILARITY_WEIGHTS
+            if row is not None:
+                distances[row] = np.inf  # el propio coche no cuenta
+            k = min(k, n - (row is not None))
+            if k <= 0:
+                return []
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top], kind="stable")]
+            return self._ids[top].tolist()
+
+
+similar_cars = CarFeatureIndex()
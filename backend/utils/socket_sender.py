@@ -0,0 +1,71 @@
+# backend/utils/socket_sender.py
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import WebSocket
+
+from backend.config import SOCKET_SEND_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 1013 "Try Again Later": el cliente puede reconectar y recuperar el historial
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class SocketSender:
+    """Cola de salida acotada de un WebSocket, vaciada por su propia tarea.
+
+    `send()` no espera nunca: encola el texto ya serializado y vuelve, así que un
+    cliente lento no retrasa a los demás destinatarios. Si la cola llega a
+    `max_queue` mensajes (el cliente no da abasto), se cierra la conexión en vez
+    de perder mensajes en silencio o dejar crecer la memoria.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int = SOCKET_SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.closed = False
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = asyncio.create_task(self._drain(), name="socket-sender")
+
+    def send(self, text: str) -> bool:
+        """Encola `text`; False si la conexión ya está cerrada o se acaba de cerrar por lenta."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Cliente lento (%s mensajes sin enviar); se cierra el socket", self._queue.qsize())
+            self._close_later(SLOW_CONSUMER_CLOSE_CODE)
+            return False
+
+    async def _drain(self) -> None:
+        while True:
+            text = await self._queue.get()
+            try:
+                await self.websocket.send_text(text)
+            except Exception as exc:
+                logger.info("Envío al socket fallido, se descarta la conexión: %r", exc)
+                self.closed = True
+                return
+
+    def _close_later(self, code: int) -> None:
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass  # ya cerrado por el cliente
+
+    async def aclose(self) -> None:
+        """Detiene la tarea de envío (al terminar el bucle de recepción del socket)."""
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
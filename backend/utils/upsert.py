@@ -0,0 +1,17 @@
+# backend/utils/upsert.py
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert_insert(db: Session, model):
+    """`insert(model)` del dialecto de la sesión, con `on_conflict_do_update` y `excluded`.
+
+    PostgreSQL y SQLite (≥ 3.35, también con RETURNING) comparten la misma API;
+    para otros dialectos se lanza NotImplementedError y el llamador decide.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"INSERT ... ON CONFLICT no soportado en {dialect}")
@@ -0,0 +1,46 @@
+# backend/worker.py
+"""Ejecuta las tareas periódicas fuera de la API.
+
+Es el único sitio donde corren en producción: la API no las arranca salvo con
+RUN_BACKGROUND_JOBS=true (solo para desarrollo con un único proceso). Así hay un
+solo barrido en marcha aunque se levanten varios workers de uvicorn.
+
+Uso:
+    python backend/worker.py
+    python backend/worker.py --run compute_recommendations   # una tarea, una vez
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Asegurar que el directorio raíz esté en sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.background import PERIODIC_JOBS, run_with_session, start_periodic_jobs, stop_periodic
+
+
+async def main() -> None:
+    start_periodic_jobs()
+    print(f"🚀 Worker en marcha: {', '.join(name for name, _, _ in PERIODIC_JOBS)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stop_periodic()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tareas periódicas de Portfolio Cars")
+    parser.add_argument("--run", choices=[name for name, _, _ in PERIODIC_JOBS],
+                        help="Ejecuta una sola tarea una vez y termina (p. ej. desde cron)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.run:
+        job = next(job for name, _, job in PERIODIC_JOBS if name == args.run)
+        print(f"✅ {args.run}: {run_with_session(job)}")
+        sys.exit(0)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("👋 Worker detenido.")
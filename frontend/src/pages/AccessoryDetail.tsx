@@ -5,6 +5,8 @@ import { useAuth } from '../context/AuthContext';
 import { useCart } from '../context/CartContext';
 import { toast } from 'react-hot-toast';
 import api from '../services/api';
+import { getRelatedAccessories } from '../services/accessoryApi';
+import AccessoryCard from '../components/AccessoryCard';
 import {
   createAccessoryComment,
   getAccessoryComments,
@@ -24,6 +26,7 @@ const AccessoryDetail = () => {
   const [newComment, setNewComment] = useState('');
   const [replyingTo, setReplyingTo] = useState<number | null>(null);
   const [submitting, setSubmitting] = useState(false);
+  const [related, setRelated] = useState<any[]>([]);
 
   useEffect(() => {
     const fetchAccessory = async () => {
@@ -52,8 +55,17 @@ const AccessoryDetail = () => {
       }
     };
 
+    const loadRelated = async () => {
+      try {
+        setRelated(await getRelatedAccessories(Number(id)));
+      } catch (err) {
+        setRelated([]); // las recomendaciones son opcionales: sin ellas la página funciona igual
+      }
+    };
+
     fetchAccessory();
     loadComments();
+    loadRelated();
   }, [id, navigate]);
 
   const handleAddToCart = () => {
@@ -227,6 +239,18 @@ const AccessoryDetail = () => {
           </div>
         </div>
 
+        {/* Comprados juntos */}
+        {related.length > 0 && (
+          <div className="mt-16">
+            <h2 className="text-2xl font-bold text-text mb-6">Comprados juntos con frecuencia</h2>
+            <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-6">
+              {related.map((item) => (
+                <AccessoryCard key={item.id} accessory={item} />
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Comentarios */}
         <div className="mt-16">
           <h2 className="text-2xl font-bold text-text mb-6">Comentarios ({comments.length})</h2>
@@ -29,7 +29,7 @@ const AdminDashboard = () => {
       setLoading(true);
       try {
         const loadUsers = api.get('/users').then(res => setUsers(res.data)).catch(err => console.error('Users:', err));
-        const loadCars = api.get('/cars').then(res => setCars(res.data)).catch(err => console.error('Cars:', err));
+        const loadCars = api.get('/cars', { params: { fields: 'all' } }).then(res => setCars(res.data)).catch(err => console.error('Cars:', err));
         const loadAccessories = api.get('/accessories').then(res => setAccessories(res.data)).catch(err => console.error('Accessories:', err));
         await Promise.allSettled([loadUsers, loadCars, loadAccessories]);
       } catch (error) {
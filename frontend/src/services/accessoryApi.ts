@@ -23,3 +23,9 @@ export const getAccessoryById = async (id: number): Promise<Accessory> => {
   const response = await api.get<Accessory>(`/accessories/${id}`);
   return response.data;
 };
+
+// "Comprados juntos": accesorios que suelen aparecer en la misma compra
+export const getRelatedAccessories = async (id: number, limit: number = 4): Promise<Accessory[]> => {
+  const response = await api.get<Accessory[]>(`/accessories/${id}/related`, { params: { limit } });
+  return response.data;
+};
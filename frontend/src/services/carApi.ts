@@ -19,7 +19,7 @@ export interface Car {
 }
 
 export const getCars = async (): Promise<Car[]> => {
-  const response = await api.get<Car[]>('/cars');
+  const response = await api.get<Car[]>('/cars', { params: { fields: 'all' } });
   return response.data;
 };
 
@@ -16,6 +16,15 @@ export const addToCart = async (userId: number, accessoryId: number, quantity: n
   return response.data;
 };
 
+// Sustituye el carrito completo en una sola petición (el backend aplica solo la diferencia)
+export const replaceCart = async (
+  userId: number,
+  items: { accessory_id: number; quantity: number }[]
+): Promise<CartItem[]> => {
+  const response = await api.put<CartItem[]>(`/cart/${userId}`, items);
+  return response.data;
+};
+
 export const removeFromCart = async (userId: number, cartItemId: number): Promise<void> => {
   await api.delete(`/cart/${userId}/${cartItemId}`);
 };
\ No newline at end of file